@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import write_patients_csv
+from hdp_dataset import DatasetCache, load_frame
+from hdp_model import drop_zero_vitals
+
+
+def parse_csv(path):
+    return drop_zero_vitals(pd.read_csv(path))
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV parsing versus the columnar dataset cache")
+    parser.add_argument('--sizes', default='1000,1000000,10000000', help="comma separated row counts")
+    parser.add_argument('--dir', help="where to write the synthetic CSVs (default: a temporary directory)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        for n_rows in (int(size) for size in args.sizes.split(',')):
+            csv_path = os.path.join(workdir, f"patients_{n_rows}.csv")
+            cache_root = os.path.join(workdir, 'cache')
+            write_patients_csv(csv_path, n_rows)
+
+            csv_seconds, df = timed(lambda: parse_csv(csv_path))
+            build_seconds, _ = timed(lambda: DatasetCache(csv_path, cache_root).load_columns())
+            mmap_seconds, (columns, _, _) = timed(lambda: DatasetCache(csv_path, cache_root).load_columns())
+            frame_seconds, cached = timed(lambda: load_frame(csv_path, cache_root))
+            if len(cached) != len(df) or not np.array_equal(cached['Oldpeak'].to_numpy(), df['Oldpeak'].to_numpy()):
+                raise SystemExit(f"cache content differs from the CSV at {n_rows} rows")
+
+            csv_mb = os.path.getsize(csv_path) / 1e6
+            cache_mb = sum(column.nbytes for column in columns.values()) / 1e6
+            print(f"{n_rows:>9} rows  csv {csv_mb:8.1f} MB  cache {cache_mb:7.1f} MB | "
+                  f"read_csv {csv_seconds * 1e3:9.1f} ms  build {build_seconds * 1e3:9.1f} ms  "
+                  f"mmap {mmap_seconds * 1e3:7.2f} ms  DataFrame {frame_seconds * 1e3:8.1f} ms  "
+                  f"x{csv_seconds / frame_seconds:.0f}")
+
+
+if __name__ == "__main__":
+    main()
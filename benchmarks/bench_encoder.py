@@ -0,0 +1,70 @@
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hdp_encoder import FeatureEncoder
+from hdp_model import CATEGORICAL_COLS, FEATURES, load_data, load_model
+
+
+def legacy_prepare_input(answers, scaler, feature_columns):
+    # The pre-encoder prepare_input from HeartDiseaseApp, kept for comparison
+    data = pd.DataFrame([answers])
+    data = pd.get_dummies(data, columns=CATEGORICAL_COLS)
+    for col in feature_columns:
+        if col not in data.columns:
+            data[col] = 0
+    data = data[feature_columns]
+    return scaler.transform(data)
+
+
+def legacy_prepare_batch(df, scaler, feature_columns):
+    data = pd.get_dummies(df, columns=CATEGORICAL_COLS)
+    data = data.reindex(columns=feature_columns, fill_value=0)
+    return scaler.transform(data)
+
+
+def best_of(stmt, number, repeat=5):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    model, scaler, feature_columns = load_model()
+    encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+    df = load_data()[FEATURES].reset_index(drop=True)
+    records = df.to_dict('records')
+
+    # Bit-identical check, including an unseen category
+    for answers in records + [dict(records[0], ChestPainType='XX')]:
+        expected = legacy_prepare_input(answers, scaler, feature_columns)
+        if not np.array_equal(expected, encoder.encode(answers)):
+            raise SystemExit(f"Encoder output differs for {answers}")
+    if not np.array_equal(legacy_prepare_batch(df, scaler, feature_columns), encoder.encode_columns(df)):
+        raise SystemExit("Column encoder output differs")
+    if not np.array_equal(legacy_prepare_batch(df, scaler, feature_columns), encoder.encode(records)):
+        raise SystemExit("Batched record encoder output differs")
+    print(f"Encoder output is bit-identical on {len(records)} rows")
+
+    answers = records[0]
+    buffer = encoder.empty(1)
+    legacy = best_of(lambda: legacy_prepare_input(answers, scaler, feature_columns), 200)
+    single = best_of(lambda: encoder.encode(answers, out=buffer), 20000)
+    print(f"single row   legacy {legacy * 1e6:9.1f} us   encoder {single * 1e6:9.1f} us   x{legacy / single:.0f}")
+
+    for size in (100, 10_000):
+        batch = pd.concat([df] * (size // len(df) + 1)).head(size).reset_index(drop=True)
+        batch_records = batch.to_dict('records')
+        out = encoder.empty(size)
+        legacy = best_of(lambda: legacy_prepare_batch(batch, scaler, feature_columns), 5)
+        rows = best_of(lambda: encoder.encode(batch_records, out=out), 5)
+        cols = best_of(lambda: encoder.encode_columns(batch, out=out), 5)
+        print(f"batch {size:>6}  legacy {legacy * 1e3:9.3f} ms   records {rows * 1e3:9.3f} ms   "
+              f"columns {cols * 1e3:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
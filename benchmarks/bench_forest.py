@@ -0,0 +1,41 @@
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hdp_forest import FlatForest
+from hdp_model import load_model
+
+TOLERANCE = 1e-12
+
+
+def best_of(stmt, number, repeat=5):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main():
+    model, scaler, feature_columns = load_model()
+    forest = FlatForest.from_sklearn(model)
+    rng = np.random.default_rng(0)
+
+    # Scaled features live in [0, 1]; go a little outside to hit every branch side
+    X = rng.uniform(-0.1, 1.1, size=(100_000, len(feature_columns)))
+    error = np.abs(forest.predict_proba(X) - model.predict_proba(X)).max()
+    if error > TOLERANCE:
+        raise SystemExit(f"FlatForest differs from sklearn by {error:.3g}")
+    print(f"{forest.n_estimators} trees, {len(forest.feature)} nodes, depth {forest.max_depth}, "
+          f"max abs error {error:.3g}")
+
+    for size, number in ((1, 200), (100, 50), (100_000, 1)):
+        batch = X[:size]
+        sk = best_of(lambda: model.predict_proba(batch), number, repeat=3)
+        flat = best_of(lambda: forest.predict_proba(batch), number, repeat=3)
+        print(f"batch {size:>7}  sklearn {sk * 1e3:10.3f} ms   flat {flat * 1e3:10.3f} ms   "
+              f"speedup x{sk / flat:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hdp_model import FEATURES, load_data
+
+PORT = 8765
+
+
+async def client(records, n_requests, latencies, offset):
+    reader, writer = await asyncio.open_connection('127.0.0.1', PORT)
+    for i in range(n_requests):
+        body = json.dumps(records[(offset + i) % len(records)]).encode()
+        start = time.perf_counter()
+        writer.write(b"POST /predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                     + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b'\r\n':
+                break
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def load(records, concurrency, n_requests):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(records, n_requests, latencies, c * n_requests) for c in range(concurrency)))
+    return time.perf_counter() - start, np.array(latencies)
+
+
+def wait_for_server(proc):
+    for _ in range(600):
+        if proc.poll() is not None:
+            raise SystemExit("server exited during startup")
+        try:
+            with socket.create_connection(('127.0.0.1', PORT), timeout=0.1):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise SystemExit("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of hdp_server with and without micro-batching")
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=50, help="requests per client")
+    parser.add_argument('--windows', default='0,2,5', help="comma separated batch windows in ms")
+    args = parser.parse_args()
+
+    records = load_data(os.path.join(ROOT, 'heart_disease_prediction.csv'))[FEATURES].to_dict('records')
+    for window in args.windows.split(','):
+        proc = subprocess.Popen([sys.executable, 'hdp_server.py', '--port', str(PORT), '--window-ms', window],
+                                cwd=ROOT, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_server(proc)
+            elapsed, latencies = asyncio.run(load(records, args.concurrency, args.requests))
+        finally:
+            proc.terminate()
+            proc.wait()
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+        print(f"window {window:>4} ms  {len(latencies) / elapsed:8.0f} req/s   p50 {p50:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
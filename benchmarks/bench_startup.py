@@ -0,0 +1,69 @@
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay off the prediction path once an artifact exists
+HEAVY_MODULES = ['pandas', 'sklearn', 'joblib', 'scipy']
+
+SCENARIOS = {
+    'predict': ("import sys\n"
+                "from hdp_model import load_predictor\n"
+                "load_predictor()\n"
+                "print(','.join(m for m in %r if m in sys.modules))\n" % HEAVY_MODULES),
+    'gui': "import hdp_eng_version\n",
+}
+# Import-time budgets in milliseconds; generous enough for a loaded CI box
+THRESHOLDS_MS = {'predict': 400, 'gui': 800}
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def top_level_import_ms(stderr):
+    total = 0
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        # Nested imports are indented and already counted in their parent
+        if match and not match.group(3):
+            total += int(match.group(2))
+    return total / 1000.0
+
+
+def run(code):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return top_level_import_ms(result.stderr), result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the startup paths with -X importtime")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply the thresholds, e.g. for slow machines")
+    args = parser.parse_args()
+
+    # Make sure an artifact exists so the predict scenario measures the load path
+    run("from hdp_model import load_predictor\nload_predictor()\n")
+
+    failed = False
+    for name, code in SCENARIOS.items():
+        timings = []
+        for _ in range(args.repeat):
+            ms, output = run(code)
+            timings.append(ms)
+        median = statistics.median(timings)
+        limit = THRESHOLDS_MS[name] * args.scale
+        status = 'ok' if median <= limit else 'REGRESSION'
+        print(f"{name:8} median {median:7.1f} ms  min {min(timings):7.1f} ms  limit {limit:5.0f} ms  {status}")
+        failed |= median > limit
+        if name == 'predict' and output:
+            print(f"{name:8} imported heavy modules: {output}  REGRESSION")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from benchmarks.synthetic import write_patients_csv
+from hdp_encoder import FeatureEncoder
+from hdp_forest import FlatForest
+from hdp_model import FEATURES, load_data, train_model
+
+SUITE_VERSION = 1
+
+
+def reset_peak_rss():
+    # Linux lets a process reset its RSS high-water mark; elsewhere the peak is process-wide
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(func, repeats, rows, calls=1):
+    # Median and best wall time per call over repeats, peak RSS across all of them.
+    # Fast cases make several calls per repeat so timer resolution does not dominate.
+    reset_peak_rss()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        times.append((time.perf_counter() - start) / calls)
+    median = float(np.median(times))
+    return {
+        'seconds': median,
+        'seconds_min': min(times),
+        'repeats': repeats,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rows_per_s': rows / median if median > 0 else None,
+    }
+
+
+def run_suite(scales, batches, train_max, repeats, train_repeats, n_jobs, workdir, log):
+    results = []
+
+    def record(name, scale, batch, func, rows, calls=1, n_repeats=repeats):
+        result = {'name': name, 'scale': scale, 'batch': batch, **measure(func, n_repeats, rows, calls)}
+        results.append(result)
+        log(f"{name:<22} scale {scale:>9} batch {str(batch or '-'):>6}  "
+            f"{result['seconds'] * 1e3:11.3f} ms  {result['rows_per_s'] or 0:14,.0f} rows/s  "
+            f"peak {result['peak_rss_mb']:8.1f} MB")
+
+    for scale in scales:
+        csv_path = os.path.join(workdir, f"patients_{scale}.csv")
+        write_patients_csv(csv_path, scale)
+        df = load_data(csv_path, use_cache=False)
+        record('load_data.csv', scale, None, lambda: load_data(csv_path, use_cache=False), len(df))
+        # Keep the column cache beside the synthetic CSVs rather than in the repo's artifacts
+        load_data(csv_path, artifact_dir=workdir)
+        record('load_data.cached', scale, None, lambda: load_data(csv_path, artifact_dir=workdir), len(df))
+
+        if scale > train_max:
+            continue
+        record('train_model', scale, None, lambda: train_model(df, n_jobs=n_jobs), len(df),
+               n_repeats=train_repeats)
+        model, scaler, feature_columns = train_model(df, n_jobs=n_jobs)
+        forest = FlatForest.from_sklearn(model)
+        encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+        records = df[FEATURES].to_dict('records')
+
+        for batch in batches:
+            if batch > len(df):
+                continue
+            calls = max(1, 1000 // batch)
+            if batch == 1:
+                # The GUI path: one dict into a reused buffer
+                buffer = encoder.empty(1)
+                record('encode', scale, batch, lambda: encoder.encode(records[0], out=buffer), batch, calls)
+            else:
+                frame = df.iloc[:batch]
+                record('encode', scale, batch, lambda: encoder.encode_columns(frame), batch, calls)
+
+            X = encoder.encode_columns(df.iloc[:batch])
+            record('predict_proba.flat', scale, batch, lambda: forest.predict_proba(X), batch, calls)
+            record('predict_proba.sklearn', scale, batch, lambda: model.predict_proba(X), batch, calls)
+    return results
+
+
+def environment():
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'suite_version': SUITE_VERSION,
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    # A case regresses when its best time grows by more than threshold (0.1 = 10%);
+    # the best of the repeats is far less sensitive to a busy machine than the median
+    previous = {(r['name'], r['scale'], r['batch']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['name'], result['scale'], result['batch']))
+        if old is None:
+            continue
+        ratio = result['seconds_min'] / old['seconds_min']
+        flag = 'REGRESSION' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else '')
+        print(f"{result['name']:<22} scale {result['scale']:>9} batch {str(result['batch'] or '-'):>6}  "
+              f"{old['seconds_min'] * 1e3:11.3f} -> {result['seconds_min'] * 1e3:11.3f} ms  x{ratio:5.2f}  {flag}")
+        if flag == 'REGRESSION':
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data loading, training and inference on synthetic data")
+    parser.add_argument('--scales', default='1000,100000', help="comma separated dataset sizes in rows")
+    parser.add_argument('--batches', default='1,100,10000', help="comma separated batch sizes for encode/predict")
+    parser.add_argument('--train-max', type=int, default=100_000,
+                        help="skip training and inference above this many rows")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--train-repeats', type=int, default=1)
+    parser.add_argument('--n-jobs', type=int, default=None, help="training parallelism (default: one core)")
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help="where to write the results")
+    parser.add_argument('--compare', metavar='BASELINE', help="results file to check for regressions against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="relative slowdown counted as a regression (default 0.10)")
+    parser.add_argument('--dir', help="where to write the synthetic CSVs (default: a temporary directory)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(',')]
+    batches = [int(b) for b in args.batches.split(',')]
+    with tempfile.TemporaryDirectory(dir=args.dir) as workdir:
+        results = run_suite(scales, batches, args.train_max, args.repeats, args.train_repeats, args.n_jobs,
+                            workdir, print)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
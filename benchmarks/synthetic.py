@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+CATEGORIES = {
+    'Sex': (["M", "F"], [0.79, 0.21]),
+    'ChestPainType': (["ASY", "NAP", "ATA", "TA"], [0.54, 0.22, 0.19, 0.05]),
+    'RestingECG': (["Normal", "LVH", "ST"], [0.60, 0.21, 0.19]),
+    'ExerciseAngina': (["N", "Y"], [0.60, 0.40]),
+    'ST_Slope': (["Flat", "Up", "Down"], [0.50, 0.43, 0.07]),
+}
+
+
+# Synthetic patients with the columns, value ranges and category frequencies of
+# heart_disease_prediction.csv, including its zero RestingBP/Cholesterol rows.
+def generate_patients(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Age': rng.normal(53.5, 9.4, n_rows).clip(28, 77).round().astype(np.int64),
+        'Sex': None,
+        'ChestPainType': None,
+        'RestingBP': rng.normal(132, 18, n_rows).clip(80, 200).round().astype(np.int64),
+        'Cholesterol': rng.normal(244, 59, n_rows).clip(85, 603).round().astype(np.int64),
+        'FastingBS': (rng.random(n_rows) < 0.23).astype(np.int64),
+        'RestingECG': None,
+        'MaxHR': rng.normal(137, 25, n_rows).clip(60, 202).round().astype(np.int64),
+        'ExerciseAngina': None,
+        'Oldpeak': rng.gamma(1.2, 0.75, n_rows).clip(0, 6.2).round(1),
+        'ST_Slope': None,
+    })
+    for column, (values, weights) in CATEGORIES.items():
+        df[column] = rng.choice(values, size=n_rows, p=weights)
+    df.loc[rng.random(n_rows) < 0.001, 'RestingBP'] = 0
+    df.loc[rng.random(n_rows) < 0.187, 'Cholesterol'] = 0
+
+    # Outcome from a rough logistic model so the data is learnable
+    logit = (0.05 * (df['Age'] - 53) + 1.2 * (df['Sex'] == "M") + 1.5 * (df['ChestPainType'] == "ASY")
+             + 1.1 * (df['ExerciseAngina'] == "Y") + 0.6 * df['Oldpeak'] + 1.6 * (df['ST_Slope'] == "Flat")
+             - 0.015 * (df['MaxHR'] - 137) + 0.8 * df['FastingBS'] - 2.2)
+    df['HeartDisease'] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(np.int64)
+    return df
+
+
+def write_patients_csv(path, n_rows, seed=0, chunk_rows=1_000_000):
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = generate_patients(min(chunk_rows, n_rows - start), seed + i)
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
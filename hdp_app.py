@@ -0,0 +1,449 @@
+import time
+
+STARTED = time.perf_counter()
+
+from concurrent.futures import ThreadPoolExecutor
+import tkinter as tk
+import customtkinter as ctk
+from tkinter import messagebox
+from hdp_core import (COMBOBOX_VALUES, LOCALES, SWEEP_FIELDS, LatestRequest, factors_message, field_error,
+                      get_predictor, parse_answers, risk_message)
+from hdp_metrics import timer
+from hdp_model import FEATURES
+
+MODEL_POLL_MS = 50
+# How often finished predictions are picked up while any are in flight
+RESULT_POLL_MS = 10
+ERROR_COLOR = "#e5534b"
+SWEEP_HEIGHT = 160
+SWEEP_COLORS = {
+    'Dark': {'bg': "#2b2b2b", 'text': "#dce4ee", 'grid': "#555555", 'curve': "#3b8ed0", 'marker': "#e5534b"},
+    'Light': {'bg': "#dbdbdb", 'text': "#1a1a1a", 'grid': "#a0a0a0", 'curve': "#1f6aa5", 'marker': "#c9302c"},
+}
+
+
+
+def assess(predictor, answers, observe=False):
+    # Runs on the prediction worker, never on the Tk thread
+    with timer('gui.assess'):
+        return predictor.risk_percent(answers, observe), predictor.explain(answers)
+
+
+def sweep_curve(predictor, answers, field, current):
+    with timer('gui.sweep'):
+        grid, risks = predictor.sweep(answers, field)
+        marker = predictor.risk_percent(answers) if current is not None else None
+    return field, grid, risks, current, marker
+
+
+class Tooltip(ctk.CTkToplevel):
+    def __init__(self, parent, text, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.withdraw()
+        self.overrideredirect(True)
+
+        # Set colors based on the current theme
+        self.update_colors()
+
+        self.label = ctk.CTkLabel(self, text=text, justify="left",
+                                corner_radius=6, fg_color=self.bg_color,
+                                text_color=self.text_color,
+                                padx=10, pady=5, wraplength=250)
+        self.label.pack()
+
+    def update_colors(self):
+        current_theme = ctk.get_appearance_mode()
+        self.bg_color = "#FFFFFF" if current_theme == "Light" else "#353638"
+        self.text_color = "#000000" if current_theme == "Light" else "#FFFFFF"
+
+    def show(self, x, y):
+        self.geometry(f"+{x}+{y}")
+        self.deiconify()
+
+    def hide(self):
+        self.withdraw()
+
+    def update_theme(self):
+        self.update_colors()
+        self.label.configure(fg_color=self.bg_color, text_color=self.text_color)
+
+class HoverTooltip:
+    def __init__(self, widget, text):
+        self.widget = widget
+        self.text = text
+        self.tooltip = None
+        self.widget.bind("<Enter>", self.show_tooltip)
+        self.widget.bind("<Leave>", self.hide_tooltip)
+
+    def show_tooltip(self, event):
+        if not self.tooltip:
+            self.tooltip = Tooltip(self.widget, self.text)
+        x = self.widget.winfo_rootx() + 25
+        y = self.widget.winfo_rooty() + 25
+        self.tooltip.show(x, y)
+
+    def hide_tooltip(self, event):
+        if self.tooltip:
+            self.tooltip.hide()
+
+    def update_theme(self):
+        if self.tooltip:
+            self.tooltip.update_theme()
+
+    def set_text(self, text):
+        self.text = text
+        if self.tooltip:
+            self.tooltip.label.configure(text=text)
+
+class HeartDiseaseApp(ctk.CTk):
+    def __init__(self, locale='en'):
+        super().__init__()
+
+        self.locale = locale
+        self.strings = LOCALES[locale]
+
+        self.title(self.strings['title'])
+        self.geometry("900x700")
+        self.resizable(True, True)
+        self.minsize(600, 500)
+
+        # Theme setup
+        ctk.set_appearance_mode("Dark")
+        ctk.set_default_color_theme("blue")
+
+        # Load or train the model in a worker thread so the window appears immediately.
+        # The predictor is shared by the whole process, whatever the language.
+        self.predictor = None
+        self.last_risk = None
+        self.last_factors = None
+        self.sweep_field = 'Cholesterol'
+        self.sweep_after = None
+        self.model_executor = ThreadPoolExecutor(max_workers=1)
+        self.model_future = self.model_executor.submit(get_predictor, n_jobs=-1)
+
+        # Scoring runs on its own worker; the Tk thread submits the latest form state and
+        # polls for the result, so typing never waits on the model
+        self.predict_executor = ThreadPoolExecutor(max_workers=1)
+        self.assessment = LatestRequest(self.predict_executor)
+        self.sweep_request = LatestRequest(self.predict_executor)
+        self.result_poll = None
+        # Fields the user has edited (or tried to submit) show their validation errors
+        self.touched = set()
+        self.field_values = {}
+
+        # Lists to store HoverTooltip and help buttons
+        self.tooltips_list = []
+        self.help_buttons = []
+
+        # Create interface
+        self.create_widgets()
+        self.evaluate_btn.configure(state="disabled")
+        self.result_label.configure(text=self.strings['loading'])
+        self.after(0, self.report_first_paint)
+        self.after(MODEL_POLL_MS, self.poll_model)
+
+    def poll_model(self):
+        if not self.model_future.done():
+            self.after(MODEL_POLL_MS, self.poll_model)
+            return
+        try:
+            self.predictor = self.model_future.result()
+        except Exception as e:
+            self.model_executor.shutdown(wait=False)
+            self.result_label.configure(text=self.strings['load_failed'])
+            messagebox.showerror(self.strings['error'], f"{self.strings['load_failed']}: {str(e)}")
+            return
+        # Build the explainer off the UI thread too, so the first assessment does not wait
+        self.model_executor.submit(self.predictor.warm_explainer)
+        self.model_executor.shutdown(wait=False)
+        self.evaluate_btn.configure(state="normal")
+        self.result_label.configure(text="")
+        self.schedule_sweep()
+        elapsed_ms = (time.perf_counter() - STARTED) * 1000
+        print(self.strings['model_ready'].format(ms=elapsed_ms))
+
+    def report_first_paint(self):
+        self.update_idletasks()
+        elapsed_ms = (time.perf_counter() - STARTED) * 1000
+        print(self.strings['first_paint'].format(ms=elapsed_ms))
+
+    def create_widgets(self):
+        # Main frame
+        self.main_frame = ctk.CTkFrame(self)
+        self.main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        # Title
+        self.title_label = ctk.CTkLabel(self.main_frame,
+                                      text=self.strings['heading'],
+                                      font=ctk.CTkFont(size=18, weight="bold"))
+        self.title_label.pack(pady=(0, 20))
+
+        # Input frame
+        self.input_frame = ctk.CTkFrame(self.main_frame)
+        self.input_frame.pack(fill="x", padx=10, pady=10)
+
+        # Input fields with tooltips
+        self.entries = {}
+        self.field_labels = {}
+        self.field_tooltips = {}
+        self.field_errors = {}
+        self.border_colors = {}
+
+        # Set initial tooltip button color based on theme
+        current_theme = ctk.get_appearance_mode()
+        button_color = "#D3D3D3" if current_theme == "Light" else "#2b2b2b"
+
+        for i, field in enumerate(FEATURES, start=1):
+            row_frame = ctk.CTkFrame(self.input_frame)
+            row_frame.pack(fill="x", pady=5)
+
+            label = ctk.CTkLabel(row_frame, text=f"{i}. {self.get_field_label(field)}:", width=180, anchor="w")
+            label.pack(side="left", padx=(0, 5))
+            self.field_labels[field] = label
+
+            if field in COMBOBOX_VALUES:
+                values = self.get_combobox_values(field)
+                self.entries[field] = ctk.CTkComboBox(row_frame, values=values, width=180,
+                                                      command=lambda value, f=field: self.on_field_edit(f))
+            else:
+                self.entries[field] = ctk.CTkEntry(row_frame, width=180)
+            self.entries[field].pack(side="left", padx=(0, 5))
+            self.entries[field].bind("<KeyRelease>", lambda event, f=field: self.on_field_edit(f))
+            self.field_values[field] = self.entries[field].get()
+            self.border_colors[field] = self.entries[field].cget("border_color")
+
+            # Help icon with dynamic color
+            help_btn = ctk.CTkLabel(row_frame, text="?", width=20,
+                                   cursor="hand2", fg_color=button_color, corner_radius=10)
+            help_btn.pack(side="left")
+            tooltip = HoverTooltip(help_btn, self.strings['tooltips'][field])
+            self.tooltips_list.append(tooltip)
+            self.help_buttons.append(help_btn)
+            self.field_tooltips[field] = tooltip
+
+            error_label = ctk.CTkLabel(row_frame, text="", text_color=ERROR_COLOR, anchor="w")
+            error_label.pack(side="left", padx=(10, 0))
+            self.field_errors[field] = error_label
+
+        self.evaluate_btn = ctk.CTkButton(self.main_frame, text=self.strings['assess'],
+                                        command=self.assess_risk, height=40)
+        self.evaluate_btn.pack(pady=20)
+
+        self.result_frame = ctk.CTkFrame(self.main_frame, height=80)
+        self.result_frame.pack(fill="x", pady=(0, 10))
+
+        self.result_label = ctk.CTkLabel(self.result_frame, text="",
+                                       font=ctk.CTkFont(size=14),
+                                       wraplength=600, justify="left")
+        self.result_label.pack(pady=10, padx=10, fill="both", expand=True)
+
+        # What-if curve: risk across the range of the numeric field last edited
+        self.sweep_switch = ctk.CTkSwitch(self.main_frame, text=self.strings['sweep_switch'],
+                                        command=self.toggle_sweep)
+        self.sweep_switch.pack(pady=(0, 10))
+        self.sweep_canvas = tk.Canvas(self.main_frame, height=SWEEP_HEIGHT, highlightthickness=0,
+                                      bg=SWEEP_COLORS[ctk.get_appearance_mode()]['bg'])
+        self.sweep_canvas.bind("<Configure>", lambda event: self.schedule_sweep())
+
+        self.theme_switch = ctk.CTkSwitch(self.main_frame,
+                                        text=self.theme_text("Dark"),
+                                        command=self.toggle_theme)
+        self.theme_switch.pack(pady=10)
+        self.theme_switch.select()
+
+        # Language switch: relabels the window in place, the loaded model is kept
+        self.language_switch = ctk.CTkSegmentedButton(self.main_frame,
+                                                    values=[strings['name'] for strings in LOCALES.values()],
+                                                    command=self.switch_language)
+        self.language_switch.pack(pady=(0, 10))
+        self.language_switch.set(self.strings['name'])
+
+    def theme_text(self, mode):
+        return self.strings['theme_switch'].format(mode=self.strings['themes'][mode])
+
+    def toggle_theme(self):
+        current_mode = ctk.get_appearance_mode()
+        new_mode = "Light" if current_mode == "Dark" else "Dark"
+        ctk.set_appearance_mode(new_mode)
+        self.theme_switch.configure(text=self.theme_text(new_mode))
+
+        # Update theme for tooltips and buttons
+        button_color = "#D3D3D3" if new_mode == "Light" else "#2b2b2b"
+        for tooltip in self.tooltips_list:
+            tooltip.update_theme()
+        for button in self.help_buttons:
+            button.configure(fg_color=button_color)
+        self.sweep_canvas.configure(bg=SWEEP_COLORS[new_mode]['bg'])
+        self.schedule_sweep()
+
+    def switch_language(self, name):
+        self.locale = next(locale for locale, strings in LOCALES.items() if strings['name'] == name)
+        self.strings = LOCALES[self.locale]
+
+        self.title(self.strings['title'])
+        self.title_label.configure(text=self.strings['heading'])
+        for i, field in enumerate(FEATURES, start=1):
+            self.field_labels[field].configure(text=f"{i}. {self.get_field_label(field)}:")
+            self.field_tooltips[field].set_text(self.strings['tooltips'][field])
+            self.show_field_error(field)
+        self.evaluate_btn.configure(text=self.strings['assess'])
+        self.theme_switch.configure(text=self.theme_text(ctk.get_appearance_mode()))
+        self.sweep_switch.configure(text=self.strings['sweep_switch'])
+        self.schedule_sweep()
+
+        if self.predictor is None:
+            self.result_label.configure(text=self.strings['loading'])
+        elif self.last_risk is not None:
+            # Re-scored rather than re-rendered: the form may have turned invalid meanwhile
+            self.request_assessment()
+
+    def toggle_sweep(self):
+        if self.sweep_switch.get():
+            self.sweep_canvas.pack(fill="x", padx=10, pady=(0, 10), after=self.sweep_switch)
+            self.schedule_sweep()
+        else:
+            self.sweep_canvas.pack_forget()
+
+    def on_field_edit(self, field):
+        value = self.entries[field].get()
+        if value == self.field_values[field]:
+            # Tab, arrows and the like
+            return
+        self.field_values[field] = value
+        self.touched.add(field)
+        self.show_field_error(field)
+        if field in SWEEP_FIELDS:
+            self.sweep_field = field
+        self.schedule_sweep()
+        if self.last_risk is not None:
+            # Once assessed, the result follows the form as it is edited
+            self.request_assessment()
+
+    def show_field_error(self, field):
+        error = field_error(field, self.entries[field].get(), self.locale) if field in self.touched else None
+        self.field_errors[field].configure(text=error or "")
+        self.entries[field].configure(border_color=ERROR_COLOR if error else self.border_colors[field])
+        return error
+
+    def watch_results(self):
+        if self.result_poll is None:
+            self.result_poll = self.after(RESULT_POLL_MS, self.poll_results)
+
+    def poll_results(self):
+        self.result_poll = None
+        future = self.assessment.poll()
+        if future is not None:
+            self.show_assessment(future)
+        future = self.sweep_request.poll()
+        if future is not None:
+            self.show_sweep(future)
+        if self.assessment.busy() or self.sweep_request.busy():
+            self.watch_results()
+
+    def schedule_sweep(self):
+        if self.predictor is None or not self.sweep_switch.get():
+            return
+        # Refreshed as soon as Tk is idle: edits handled in the same pass redraw once, and
+        # sweep_request drops curves that a newer edit has made stale while computing
+        if self.sweep_after is not None:
+            self.after_cancel(self.sweep_after)
+        self.sweep_after = self.after_idle(self.refresh_sweep)
+
+    def refresh_sweep(self):
+        self.sweep_after = None
+        field = self.sweep_field
+        values = {f: entry.get() for f, entry in self.entries.items()}
+        try:
+            current = float(values[field])
+        except ValueError:
+            # The curve only needs the other fields; the swept one just places the marker
+            current = None
+            values[field] = "0"
+        try:
+            answers = parse_answers(values, self.locale)
+        except ValueError:
+            self.sweep_request.cancel()
+            self.draw_sweep_message(self.strings['sweep_incomplete'])
+            return
+        self.sweep_request.submit(sweep_curve, self.predictor, answers, field, current)
+        self.watch_results()
+
+    def show_sweep(self, future):
+        try:
+            self.draw_sweep(*future.result())
+        except Exception as e:
+            self.draw_sweep_message(self.strings['unexpected_error'].format(error=str(e)))
+
+    def draw_sweep_message(self, text):
+        canvas = self.sweep_canvas
+        canvas.delete("all")
+        canvas.create_text(canvas.winfo_width() / 2, SWEEP_HEIGHT / 2, text=text,
+                           fill=SWEEP_COLORS[ctk.get_appearance_mode()]['text'])
+
+    def draw_sweep(self, field, grid, risks, current, marker):
+        canvas = self.sweep_canvas
+        colors = SWEEP_COLORS[ctk.get_appearance_mode()]
+        canvas.delete("all")
+        left, right = 45, max(canvas.winfo_width() - 15, 60)
+        top, bottom = 25, SWEEP_HEIGHT - 25
+        span = (grid[-1] - grid[0]) or 1.0
+
+        def x(value):
+            return left + (min(max(value, grid[0]), grid[-1]) - grid[0]) / span * (right - left)
+
+        def y(risk):
+            return bottom - risk / 100 * (bottom - top)
+
+        canvas.create_text(left, top - 14, anchor="w", fill=colors['text'],
+                           text=self.strings['sweep'].format(label=self.get_field_label(field)))
+        # Tier boundaries of risk_tier
+        for level in (0, 20, 50, 100):
+            canvas.create_line(left, y(level), right, y(level), fill=colors['grid'], dash=(2, 4))
+            canvas.create_text(left - 6, y(level), anchor="e", fill=colors['text'], text=f"{level}%")
+        canvas.create_text(left, bottom + 12, anchor="w", fill=colors['text'], text=f"{grid[0]:g}")
+        canvas.create_text(right, bottom + 12, anchor="e", fill=colors['text'], text=f"{grid[-1]:.4g}")
+
+        points = [coordinate for value, risk in zip(grid, risks) for coordinate in (x(value), y(risk))]
+        canvas.create_line(*points, fill=colors['curve'], width=2)
+        if marker is not None:
+            cx, cy = x(current), y(marker)
+            canvas.create_oval(cx - 4, cy - 4, cx + 4, cy + 4, fill=colors['marker'], outline="")
+            canvas.create_text(cx, cy - 12, fill=colors['marker'], text=f"{marker}%")
+
+    def get_field_label(self, field):
+        return self.strings['labels'].get(field, field)
+
+    def get_combobox_values(self, field):
+        return COMBOBOX_VALUES.get(field, [])
+
+    def assess_risk(self):
+        self.touched.update(FEATURES)
+        self.request_assessment(observe=True)
+
+    def request_assessment(self, observe=False):
+        # Only the Assess Risk button counts the patient for drift monitoring; the
+        # re-assessments that follow edits would count every keystroke
+        with timer('predict.parse'):
+            errors = [self.show_field_error(field) for field in FEATURES]
+            if any(errors):
+                # A result still in flight is for a form that no longer exists
+                self.assessment.cancel()
+                self.result_label.configure(text=self.strings['fix_fields'])
+                return
+            answers = parse_answers({field: entry.get() for field, entry in self.entries.items()}, self.locale)
+        self.assessment.submit(assess, self.predictor, answers, observe)
+        self.watch_results()
+
+    def show_assessment(self, future):
+        try:
+            self.last_risk, self.last_factors = future.result()
+        except Exception as e:
+            self.result_label.configure(text=self.strings['unexpected_error'].format(error=str(e)))
+            return
+        self.show_result()
+
+    def show_result(self):
+        text = risk_message(self.last_risk, self.locale)
+        if self.last_factors is not None:
+            text += "\n\n" + factors_message(*self.last_factors, locale=self.locale)
+        self.result_label.configure(text=text)
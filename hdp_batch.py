@@ -0,0 +1,165 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from hdp_core import COMBOBOX_VALUES
+from hdp_encoder import FeatureEncoder
+from hdp_drift import start_monitor
+from hdp_metrics import timer
+from hdp_model import (ARTIFACT_DIR, CATEGORICAL_COLS, DATA_PATH, FEATURES, load_forest, load_model,
+                       read_artifact_meta, risk_tier)
+
+NUMERIC_COLS = [col for col in FEATURES if col not in CATEGORICAL_COLS]
+
+
+def dedupe_rows(X):
+    # Hash-based grouping of identical encoded rows, O(n) unlike np.unique's sort
+    hashes = pd.util.hash_pandas_object(pd.DataFrame(X, copy=False), index=False).to_numpy()
+    inverse, uniques = pd.factorize(hashes)
+    first = np.empty(len(uniques), dtype=np.intp)
+    first[inverse[::-1]] = np.arange(len(inverse) - 1, -1, -1)
+    unique = X[first]
+    if not np.array_equal(unique[inverse], X):
+        # A 64-bit hash collision: fall back to exact grouping
+        unique, inverse = np.unique(X, axis=0, return_inverse=True)
+    return unique, inverse.ravel()
+
+
+def drift_summary(monitor):
+    fields = monitor.snapshot()['fields']
+    field, top = max(fields.items(), key=lambda item: item[1].get('psi', 0.0))
+    invalid = sum(entry['invalid'] for entry in fields.values())
+    # Zeros only stand out where training had none, like RestingBP and Cholesterol
+    zero = sum(entry.get('zero', 0) for name, entry in fields.items()
+               if monitor.reference['fields'][name].get('zero_rate') == 0)
+    return (f"Drift: highest PSI {top.get('psi', 0.0):.3f} ({field}); {invalid} invalid values, "
+            f"{zero} zeros in fields that are never zero in training")
+
+
+def numeric_features(chunk):
+    # Feature columns with unparseable or infinite numbers turned into NaN, so that a bad
+    # cell skips its row like a missing one; the output keeps the original text
+    features = chunk[FEATURES].copy()
+    for col in NUMERIC_COLS:
+        values = pd.to_numeric(features[col], errors='coerce')
+        features[col] = values.where(np.isfinite(values))
+    return features
+
+
+def score_chunk(chunk, model, encoder, explainer=None, monitor=None):
+    features = numeric_features(chunk)
+    if monitor is not None:
+        with timer('batch.drift'):
+            monitor.observe_columns(features)
+    risk = np.full(len(chunk), np.nan)
+    contributions = np.full((len(chunk), len(FEATURES)), np.nan) if explainer is not None else None
+    # A category the model never saw would encode as all-zero dummies, so it skips its row too
+    known = pd.concat([features[col].isin(COMBOBOX_VALUES[col]) for col in CATEGORICAL_COLS], axis=1)
+    valid = (features.notna().all(axis=1) & known.all(axis=1)).to_numpy()
+    n_unique = 0
+    if valid.any():
+        with timer('batch.encode'):
+            X = encoder.encode_columns(features[valid])
+        # Duplicate patients are scored once and the result scattered back
+        with timer('batch.dedupe'):
+            unique, inverse = dedupe_rows(X)
+        n_unique = len(unique)
+        with timer('batch.predict'):
+            risk[valid] = np.round(model.predict_proba(unique)[:, 1] * 100, 1)[inverse]
+        if explainer is not None:
+            with timer('batch.explain'):
+                contributions[valid] = np.round(explainer.explain(unique)[1] * 100, 2)[inverse]
+
+    chunk = chunk.copy()
+    chunk['risk_percent'] = risk
+    chunk['risk_tier'] = [risk_tier(r) if r == r else '' for r in risk]
+    if explainer is not None:
+        # Percentage points each field adds to the average risk, TreeSHAP on the forest
+        for field, column in zip(FEATURES, contributions.T):
+            chunk[f"contrib_{field}"] = column
+    return chunk, int((~valid).sum()), n_unique
+
+
+def score_csv(input_path, output, model, encoder, chunksize=100_000, explainer=None, monitor=None):
+    rows = skipped = scored_rows = 0
+    reader = pd.read_csv(input_path, chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        missing = [col for col in FEATURES if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+
+        scored, invalid, n_unique = score_chunk(chunk, model, encoder, explainer, monitor)
+        scored.to_csv(output, header=(i == 0), index=False)
+        rows += len(scored)
+        skipped += invalid
+        scored_rows += n_unique
+    return rows, skipped, scored_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV of patients with the heart disease model")
+    parser.add_argument('input', help="CSV with the 11 feature columns of heart_disease_prediction.csv")
+    parser.add_argument('-o', '--output', default='-', help="output CSV (default: stdout)")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows per chunk")
+    parser.add_argument('--data', default=DATA_PATH, help="training dataset")
+    parser.add_argument('--artifacts', default=ARTIFACT_DIR, help="model artifact directory")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="scoring processes sharing the model through shared memory (0: one per core)")
+    parser.add_argument('--explain', action='store_true',
+                        help="add contrib_<field> columns: each field's share of the risk in percentage points")
+    parser.add_argument('--compact', metavar='PATH', help="score with a model file written by hdp_train.py compact")
+    args = parser.parse_args(argv)
+    if args.compact and (args.explain or args.workers != 1):
+        parser.error("--compact cannot be combined with --explain or --workers")
+
+    explainer = scorer = monitor = None
+    if args.compact:
+        from hdp_compact import load_compact
+
+        model, encoder = load_compact(args.compact)
+    else:
+        model, scaler, feature_columns = load_model(args.data, artifact_dir=args.artifacts)
+        encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+        meta = read_artifact_meta(args.artifacts)
+        monitor = start_monitor(meta.get('reference') if meta else None)
+    if args.explain:
+        from hdp_explain import ForestExplainer
+
+        explainer = ForestExplainer(load_forest(model, args.artifacts), feature_columns)
+    if args.workers != 1:
+        from hdp_parallel import ParallelScorer
+
+        scorer = model = ParallelScorer(load_forest(model, args.artifacts), args.workers or None)
+
+    start = time.perf_counter()
+    try:
+        if args.output == '-':
+            rows, skipped, scored_rows = score_csv(args.input, sys.stdout, model, encoder, args.chunksize,
+                                                   explainer, monitor)
+        else:
+            with open(args.output, 'w', newline='', encoding='utf-8') as out:
+                rows, skipped, scored_rows = score_csv(args.input, out, model, encoder, args.chunksize,
+                                                       explainer, monitor)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if scorer is not None:
+            scorer.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({skipped} with missing or invalid values, "
+          f"{scored_rows} distinct rows sent to the model)", file=sys.stderr)
+    if explainer is not None:
+        print(f"Contributions are relative to the average risk of {explainer.expected_value * 100:.1f}%",
+              file=sys.stderr)
+    if monitor is not None:
+        print(drift_summary(monitor), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+
+from hdp_encoder import FeatureEncoder
+
+# Bump when the layout of the compact file changes
+COMPACT_VERSION = 1
+COMPACT_FILE = 'model_compact.npz'
+# Leaf probabilities are stored as round(p * PROB_SCALE) in a uint16
+PROB_SCALE = np.iinfo(np.uint16).max
+
+
+def breadth_first(left, right):
+    # Renumbers one tree so that every node's two children are adjacent
+    order = [0]
+    for node in order:
+        if left[node] != -1:
+            order += [left[node], right[node]]
+    order = np.asarray(order)
+    new_id = np.empty(len(order), dtype=np.intp)
+    new_id[order] = np.arange(len(order))
+    return order, new_id
+
+
+def tree_predictions(forest, X):
+    # P(class 1) of every tree for every row, (trees, rows)
+    return forest.value[forest.apply(X), 1].T
+
+
+def merge_duplicates(predictions, tolerance):
+    # Greedily folds each tree into an earlier kept one whose predictions on the reference
+    # rows are all within tolerance; the kept tree's weight counts the trees it stands for
+    kept, weights = [], []
+    for tree, p in enumerate(predictions):
+        for k, other in enumerate(kept):
+            if np.max(np.abs(p - predictions[other])) <= tolerance:
+                weights[k] += 1
+                break
+        else:
+            kept.append(tree)
+            weights.append(1)
+    return kept, weights
+
+
+# A FlatForest quantized for deployment: per node an int8 feature, a uint16 code and a
+# uint16 tree-local index of the left child (the right one follows it). The code of a
+# split is the rank of its threshold among the distinct thresholds on that feature,
+# which inputs are ranked against once per row, so every comparison is exact; the code
+# of a leaf is its P(class 1) quantized to 16 bits.
+class CompactForest:
+    def __init__(self, feature, code, left, roots, weights, codebook, offsets, max_depth, classes):
+        self.feature = feature
+        self.code = code
+        self.left = left
+        self.roots = roots
+        self.weights = weights
+        self.codebook = codebook
+        self.offsets = offsets
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_estimators = len(roots)
+        self.n_features = len(offsets) - 1
+        self.scale = 1.0 / (PROB_SCALE * float(np.sum(weights)))
+
+    @classmethod
+    def from_forest(cls, forest, n_features, X_reference=None, prune_tolerance=0.0):
+        if len(forest.classes_) != 2:
+            raise ValueError("the compact format stores binary classifiers only")
+        if n_features > np.iinfo(np.int8).max:
+            raise ValueError("too many encoded columns for 8-bit feature indices")
+        roots = list(forest.roots) + [len(forest.feature)]
+        trees = list(range(forest.n_estimators))
+        weights = [1] * len(trees)
+        if prune_tolerance > 0 and X_reference is not None:
+            trees, weights = merge_duplicates(tree_predictions(forest, X_reference), prune_tolerance)
+
+        splits = forest.feature >= 0
+        codebook = [np.unique(forest.threshold[splits & (forest.feature == f)]) for f in range(n_features)]
+        if max(len(c) for c in codebook) > np.iinfo(np.uint16).max:
+            raise ValueError("a feature has too many distinct thresholds for 16-bit codes")
+        offsets = np.cumsum([0] + [len(c) for c in codebook])
+
+        features, codes, lefts, starts = [], [], [], []
+        offset = 0
+        for tree in trees:
+            start, stop = roots[tree], roots[tree + 1]
+            if stop - start > np.iinfo(np.uint16).max:
+                raise ValueError("a tree has too many nodes for 16-bit child indices")
+            left = forest.left[start:stop] - start
+            right = forest.right[start:stop] - start
+            is_leaf = forest.feature[start:stop] < 0
+            order, new_id = breadth_first(np.where(is_leaf, -1, left), right)
+
+            feature = forest.feature[start:stop][order]
+            code = np.round(forest.value[start:stop, 1][order] * PROB_SCALE)
+            threshold = forest.threshold[start:stop][order]
+            for f in np.unique(feature[feature >= 0]):
+                code[feature == f] = np.searchsorted(codebook[f], threshold[feature == f])
+            features.append(feature.astype(np.int8))
+            codes.append(code.astype(np.uint16))
+            lefts.append(np.where(is_leaf[order], 0, new_id[left[order]]).astype(np.uint16))
+            starts.append(offset)
+            offset += stop - start
+
+        return cls(np.concatenate(features), np.concatenate(codes), np.concatenate(lefts),
+                   np.asarray(starts, dtype=np.int32), np.asarray(weights, dtype=np.uint16),
+                   np.concatenate(codebook), offsets.astype(np.int32), forest.max_depth, forest.classes_)
+
+    def rank(self, X):
+        # Per feature, how many of its thresholds each input exceeds; x <= threshold k
+        # exactly when rank <= k. Inputs are compared as float32, like sklearn.
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        R = np.empty(X.shape, dtype=np.int32)
+        for f in range(self.n_features):
+            R[:, f] = np.searchsorted(self.codebook[self.offsets[f]:self.offsets[f + 1]], X[:, f])
+        return R
+
+    def apply(self, X):
+        # Leaf index of every (row, tree), walked level by level as in FlatForest.apply
+        R = self.rank(X)
+        n_rows, n_features = R.shape
+        flat_R = R.ravel()
+        base = np.tile(self.roots.astype(np.intp), n_rows)
+        node = base.copy()
+        row_offset = np.repeat(np.arange(0, n_rows * n_features, n_features), self.n_estimators)
+        active = np.flatnonzero(self.feature[node] >= 0)
+        for _ in range(self.max_depth):
+            if not len(active):
+                break
+            current = node[active]
+            go_right = flat_R[row_offset[active] + self.feature[current]] > self.code[current]
+            current = base[active] + self.left[current] + go_right
+            node[active] = current
+            active = active[self.feature[current] >= 0]
+        return node.reshape(n_rows, self.n_estimators)
+
+    def predict_proba(self, X, block_rows=4096, out=None):
+        X = np.atleast_2d(X)
+        if out is None:
+            out = np.empty((len(X), 2), dtype=np.float64)
+        for start in range(0, len(X), block_rows):
+            leaves = self.apply(X[start:start + block_rows])
+            p = (self.code[leaves] @ self.weights.astype(np.float64)) * self.scale
+            out[start:start + block_rows, 1] = p
+            out[start:start + block_rows, 0] = 1.0 - p
+        return out
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.code, self.left, self.roots, self.weights,
+                                      self.codebook, self.offsets))
+
+
+def save_compact(path, forest, encoder):
+    # One self-contained file: the forest plus the encoder's MinMax parameters
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp.npz'
+    np.savez_compressed(tmp, version=np.asarray(COMPACT_VERSION), feature=forest.feature, code=forest.code,
+                        left=forest.left, roots=forest.roots, weights=forest.weights, codebook=forest.codebook,
+                        offsets=forest.offsets, max_depth=np.asarray(forest.max_depth), classes=forest.classes_,
+                        feature_columns=np.asarray(encoder.feature_columns), scale=encoder.scale,
+                        min=encoder.min)
+    os.replace(tmp, path)
+
+
+def load_compact(path):
+    # (CompactForest, FeatureEncoder), with NumPy only
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['version']) != COMPACT_VERSION:
+            raise ValueError(f"{path} is compact format v{int(data['version'])}, expected v{COMPACT_VERSION}")
+        forest = CompactForest(data['feature'], data['code'], data['left'], data['roots'], data['weights'],
+                               data['codebook'], data['offsets'], data['max_depth'], data['classes'])
+        encoder = FeatureEncoder(data['feature_columns'].tolist(), data['scale'], data['min'])
+    return forest, encoder
+
+
+def compact_report(forest, compact, X):
+    # Risk error of the compact model against the original, in percentage points
+    error = np.abs(compact.predict_proba(X)[:, 1] - forest.predict_proba(X)[:, 1]) * 100
+    return {
+        'trees': int(forest.n_estimators),
+        'trees_kept': int(compact.n_estimators),
+        'rows': int(len(X)),
+        'max_error_pp': float(error.max()) if len(error) else 0.0,
+        'mean_error_pp': float(error.mean()) if len(error) else 0.0,
+    }
@@ -0,0 +1,467 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from hdp_drift import start_monitor
+from hdp_metrics import profiled, timer
+from hdp_model import (ARTIFACT_DIR, DATA_PATH, FEATURES, artifact_paths, load_predictor,
+                       load_saved_predictor, read_artifact_meta, risk_tier)
+
+INT_FIELDS = ['Age', 'RestingBP', 'Cholesterol', 'MaxHR']
+FLOAT_FIELDS = ['Oldpeak']
+# Fields fed to the model as numbers (FastingBS is a 0/1 number despite its combobox)
+NUMERIC_FIELDS = INT_FIELDS + FLOAT_FIELDS + ['FastingBS']
+ARTIFACT_CHECK_INTERVAL = 1.0
+# Fields the what-if curve can sweep, and how many points it scores
+SWEEP_FIELDS = INT_FIELDS + FLOAT_FIELDS
+SWEEP_POINTS = 60
+# Fields listed under the risk as its main factors
+EXPLAIN_TOP = 3
+COMBOBOX_VALUES = {
+    'Sex': ["M", "F"],
+    'ChestPainType': ["ATA", "NAP", "ASY", "TA"],
+    'FastingBS': ["0", "1"],
+    'RestingECG': ["Normal", "ST", "LVH"],
+    'ExerciseAngina': ["Y", "N"],
+    'ST_Slope': ["Up", "Flat", "Down"]
+}
+
+LOCALES = {
+    'en': {
+        'name': "English",
+        'title': "Heart Disease Risk Prediction",
+        'heading': "Heart Disease Risk Assessment",
+        'assess': "Assess Risk",
+        'themes': {'Dark': "Dark", 'Light': "Light"},
+        'theme_switch': "{mode} Theme",
+        'labels': {
+            'Age': "Age (years)",
+            'Sex': "Sex",
+            'ChestPainType': "Chest Pain Type",
+            'RestingBP': "Blood Pressure (mmHg)",
+            'Cholesterol': "Cholesterol (mg/dl)",
+            'FastingBS': "Fasting Blood Sugar",
+            'RestingECG': "Resting ECG Result",
+            'MaxHR': "Maximum Heart Rate",
+            'ExerciseAngina': "Exercise-Induced Angina",
+            'Oldpeak': "ST Depression",
+            'ST_Slope': "ST Slope"
+        },
+        'tooltips': {
+            'Age': "Example: 45 (age in years)",
+            'Sex': "M - male, F - female",
+            'ChestPainType': "ATA - atypical angina\nNAP - non-anginal pain\nASY - asymptomatic\nTA - typical angina",
+            'RestingBP': "Example: 120 (systolic blood pressure in mmHg)",
+            'Cholesterol': "Example: 200 (cholesterol level in mg/dl)",
+            'FastingBS': "0 - blood sugar <120 mg/dl\n1 - blood sugar >120 mg/dl",
+            'RestingECG': "Normal - normal\nST - ST segment abnormality\nLVH - left ventricular hypertrophy",
+            'MaxHR': "Example: 150 (maximum heart rate)",
+            'ExerciseAngina': "Y - yes, N - no",
+            'Oldpeak': "Example: 1.5 (ST segment depression)",
+            'ST_Slope': "Up - upsloping\nFlat - flat\nDown - downsloping"
+        },
+        'empty_field': "The '{label}' field is empty",
+        'not_integer': "'{label}' must be a whole number",
+        'not_number': "'{label}' must be a number",
+        'unknown_option': "'{label}' must be one of {options}",
+        'fix_fields': "Correct the highlighted fields to see the risk",
+        'risk': "Heart Disease Risk: {risk}%",
+        'tiers': {
+            'low': "✅ Low Risk",
+            'moderate': "⚠️ Moderate Risk - Consult a doctor",
+            'high': "🚨 High Risk - Urgently consult a cardiologist"
+        },
+        'error': "Error",
+        'unexpected_error': "An error occurred: {error}",
+        'loading': "Loading model...",
+        'load_failed': "Could not load the model",
+        'first_paint': "First paint after {ms:.0f} ms",
+        'model_ready': "Model ready after {ms:.0f} ms",
+        'sweep_switch': "What-if curve",
+        'sweep': "Risk across {label}",
+        'sweep_incomplete': "Fill in the other fields to see the risk curve",
+        'factors': "Main factors against the average risk of {base}%:",
+        'points': "pp",
+    },
+    'ru': {
+        'name': "Русский",
+        'title': "Прогноз сердечных заболеваний",
+        'heading': "Оценка риска сердечных заболеваний",
+        'assess': "Оценить риск",
+        'themes': {'Dark': "Темная", 'Light': "Светлая"},
+        'theme_switch': "{mode} тема",
+        'labels': {
+            'Age': "Возраст (лет)",
+            'Sex': "Пол",
+            'ChestPainType': "Тип боли в груди",
+            'RestingBP': "Артериальное давление (мм рт.ст.)",
+            'Cholesterol': "Уровень холестерина (mg/dl)",
+            'FastingBS': "Уровень сахара натощак",
+            'RestingECG': "Результат ЭКГ в покое",
+            'MaxHR': "Максимальная ЧСС",
+            'ExerciseAngina': "Стенокардия при нагрузке",
+            'Oldpeak': "Депрессия ST сегмента",
+            'ST_Slope': "Наклон ST сегмента"
+        },
+        'tooltips': {
+            'Age': "Пример: 45 (возраст в годах)",
+            'Sex': "M - мужской, F - женский",
+            'ChestPainType': "ATA - атипичная стенокардия\nNAP - неангинозная боль\nASY - бессимптомно\nTA - типичная стенокардия",
+            'RestingBP': "Пример: 120 (систолическое давление в мм рт.ст.)",
+            'Cholesterol': "Пример: 200 (уровень холестерина в mg/dl)",
+            'FastingBS': "0 - сахар <120 мг/дл\n1 - сахар >120 мг/дл",
+            'RestingECG': "Normal - норма\nST - отклонения сегмента ST\nLVH - гипертрофия левого желудочка",
+            'MaxHR': "Пример: 150 (максимальная ЧСС)",
+            'ExerciseAngina': "Y - да, N - нет",
+            'Oldpeak': "Пример: 1.5 (депрессия ST сегмента)",
+            'ST_Slope': "Up - восходящий\nFlat - плоский\nDown - нисходящий"
+        },
+        'empty_field': "Поле '{label}' не заполнено",
+        'not_integer': "'{label}' - введите целое число",
+        'not_number': "'{label}' - введите число",
+        'unknown_option': "'{label}' - выберите одно из значений {options}",
+        'fix_fields': "Исправьте выделенные поля, чтобы увидеть риск",
+        'risk': "Риск сердечного заболевания: {risk}%",
+        'tiers': {
+            'low': "✅ Низкий риск",
+            'moderate': "⚠️ Умеренный риск - рекомендуется консультация врача",
+            'high': "🚨 Высокий риск - настоятельно рекомендуется обратиться к кардиологу"
+        },
+        'error': "Ошибка",
+        'unexpected_error': "Произошла ошибка: {error}",
+        'loading': "Загрузка модели...",
+        'load_failed': "Не удалось загрузить модель",
+        'first_paint': "Окно отрисовано через {ms:.0f} мс",
+        'model_ready': "Модель готова через {ms:.0f} мс",
+        'sweep_switch': "Кривая «что если»",
+        'sweep': "Риск в зависимости от: {label}",
+        'sweep_incomplete': "Заполните остальные поля, чтобы увидеть кривую риска",
+        'factors': "Основные факторы относительно среднего риска {base}%:",
+        'points': "п.п.",
+    },
+}
+
+
+def field_error(field, value, locale='en'):
+    # Localized problem with one raw form value, or None if parse_answers accepts it
+    strings = LOCALES[locale]
+    label = strings['labels'][field]
+    if not value:
+        return strings['empty_field'].format(label=label)
+    try:
+        # The model takes every number as a float, so whole numbers must fit one too
+        if field in INT_FIELDS:
+            float(int(value))
+        elif field in FLOAT_FIELDS and not math.isfinite(float(value)):
+            raise ValueError(value)
+    except (ValueError, OverflowError):
+        return strings['not_integer' if field in INT_FIELDS else 'not_number'].format(label=label)
+    if field in COMBOBOX_VALUES and value not in COMBOBOX_VALUES[field]:
+        return strings['unknown_option'].format(label=label, options=", ".join(COMBOBOX_VALUES[field]))
+    return None
+
+
+def record_text(value):
+    # A raw record value as form text: 45.0 is the whole number 45, NaN and Infinity stay invalid
+    if type(value) is float and value.is_integer():
+        return str(int(value))
+    return '' if value is None else str(value)
+
+
+def record_error(record, locale='en'):
+    # field_error for a record of raw values such as decoded JSON, None if every field is
+    # usable. Values of the expected type are accepted without formatting them as text.
+    for field in FEATURES:
+        value = record.get(field)
+        kind = type(value)
+        # Ints of up to 1023 bits are certain to convert to a finite float
+        small_int = kind is int and value.bit_length() < 1024
+        if field in INT_FIELDS:
+            valid = small_int
+        elif field in FLOAT_FIELDS:
+            valid = small_int or (kind is float and math.isfinite(value))
+        else:
+            valid = kind is str and value in COMBOBOX_VALUES[field]
+        if not valid:
+            error = field_error(field, record_text(value), locale)
+            if error is not None:
+                return error
+    return None
+
+
+def parse_answers(values, locale='en'):
+    # values maps field -> raw form text; raises ValueError with a localized message
+    answers = {}
+    for field in FEATURES:
+        value = values.get(field)
+        error = field_error(field, value, locale)
+        if error is not None:
+            raise ValueError(error)
+
+        if field in INT_FIELDS:
+            answers[field] = int(value)
+        elif field in FLOAT_FIELDS:
+            answers[field] = float(value)
+        else:
+            answers[field] = value
+    return answers
+
+
+def risk_message(risk_percent, locale='en'):
+    strings = LOCALES[locale]
+    return f"{strings['risk'].format(risk=risk_percent)}\n{strings['tiers'][risk_tier(risk_percent)]}"
+
+
+def factors_message(base_percent, contributions, locale='en', top=EXPLAIN_TOP):
+    # The fields that moved this patient's risk furthest from the average, largest first
+    strings = LOCALES[locale]
+    ranked = sorted(contributions.items(), key=lambda item: -abs(item[1]))[:top]
+    lines = [strings['factors'].format(base=round(base_percent, 1))]
+    lines += [f"{strings['labels'][field]}: {points:+.1f} {strings['points']}" for field, points in ranked]
+    return '\n'.join(lines)
+
+
+def answers_key(answers):
+    # Normalized, typed form of a record: 45, "45" and 45.0 are the same patient
+    return tuple(float(answers[field]) if field in NUMERIC_FIELDS else str(answers[field])
+                 for field in FEATURES)
+
+
+class PredictionCache:
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LatestRequest:
+    # Runs requests from a UI thread on an executor, keeping only the latest: at most one
+    # runs at a time, a new request replaces the queued one, and the result of one that
+    # was superseded while running is dropped. poll() is called from the UI thread.
+    def __init__(self, executor):
+        self.executor = executor
+        self.generation = 0
+        self.running = None
+        self.queued = None
+        self.dropped = 0
+
+    def submit(self, func, *args):
+        self.generation += 1
+        if self.queued is not None:
+            self.dropped += 1
+        self.queued = (self.generation, func, args)
+        if self.running is None:
+            self.start_queued()
+
+    def start_queued(self):
+        generation, func, args = self.queued
+        self.queued = None
+        self.running = (generation, self.executor.submit(func, *args))
+
+    def cancel(self):
+        # Nothing submitted so far will be returned by poll()
+        self.generation += 1
+        if self.queued is not None:
+            self.dropped += 1
+            self.queued = None
+
+    def busy(self):
+        return self.running is not None
+
+    def poll(self):
+        # The finished future of the latest request, or None
+        if self.running is None or not self.running[1].done():
+            return None
+        generation, future = self.running
+        self.running = None
+        if self.queued is not None:
+            self.start_queued()
+        if generation != self.generation:
+            self.dropped += 1
+            return None
+        return future
+
+
+class Predictor:
+    # artifact_dir=None serves a fixed model, such as a compact file, that is never reloaded
+    def __init__(self, forest, encoder, artifact_dir=ARTIFACT_DIR, cache_size=1024):
+        self.artifact_dir = artifact_dir
+        self.cache = PredictionCache(cache_size)
+        self.sweep_cache = PredictionCache(32)
+        self.lock = threading.Lock()
+        self.model_key = None
+        self.meta_mtime = None
+        self.next_check = 0.0
+        self.swap(forest, encoder)
+
+    def swap(self, forest, encoder):
+        self.forest = forest
+        self.encoder = encoder
+        self.input_buffer = encoder.empty(1)
+        self.explainer = None
+        meta = read_artifact_meta(self.artifact_dir) if self.artifact_dir is not None else None
+        self.model_key = meta['key'] if meta else None
+        self.monitor = start_monitor(meta.get('reference') if meta else None)
+        self.meta_mtime = self.artifact_mtime()
+        # Cached probabilities belong to the previous model
+        self.cache.clear()
+        self.sweep_cache.clear()
+
+    def artifact_mtime(self):
+        if self.artifact_dir is None:
+            return None
+        try:
+            return os.stat(artifact_paths(self.artifact_dir)[0]).st_mtime_ns
+        except OSError:
+            return None
+
+    def check_artifact(self):
+        # Pick up an artifact rewritten by another process (e.g. hdp_train.py); throttled to a stat per second
+        now = time.monotonic()
+        if now < self.next_check:
+            return
+        self.next_check = now + ARTIFACT_CHECK_INTERVAL
+        mtime = self.artifact_mtime()
+        if mtime is None or mtime == self.meta_mtime:
+            return
+        self.meta_mtime = mtime
+        meta = read_artifact_meta(self.artifact_dir)
+        if meta is None or meta['key'] == self.model_key:
+            return
+        loaded = load_saved_predictor(self.artifact_dir, meta['key'])
+        if loaded is not None:
+            self.swap(*loaded)
+
+    def predict_proba(self, records, observe=False):
+        # observe=True counts the records in the drift monitor; only callers scoring real
+        # patients pass it, not live previews of a form being typed
+        if isinstance(records, dict):
+            records = [records]
+        with self.lock, profiled('predict'):
+            self.check_artifact()
+            if observe and self.monitor is not None:
+                self.monitor.observe(records)
+            proba = np.empty(len(records), dtype=np.float64)
+            # Duplicate records, within the batch or seen before, are scored once
+            missing = {}
+            with timer('predict.cache'):
+                for i, answers in enumerate(records):
+                    key = answers_key(answers)
+                    cached = self.cache.get(key)
+                    if cached is None:
+                        missing.setdefault(key, []).append(i)
+                    else:
+                        proba[i] = cached
+            if missing:
+                unique = [records[positions[0]] for positions in missing.values()]
+                with timer('predict.encode'):
+                    if len(unique) == 1:
+                        X = self.encoder.encode(unique, out=self.input_buffer)
+                    else:
+                        X = self.encoder.encode(unique)
+                with timer('predict.forest'):
+                    scored = self.forest.predict_proba(X)[:, 1]
+                for (key, positions), p in zip(missing.items(), scored):
+                    proba[positions] = p
+                    self.cache.put(key, float(p))
+        return proba
+
+    def sweep_values(self, field, n_points=SWEEP_POINTS):
+        low, high = self.encoder.value_range(field)
+        values = np.linspace(low, high, n_points)
+        return np.unique(np.round(values)) if field in INT_FIELDS else values
+
+    def sweep(self, answers, field, n_points=SWEEP_POINTS):
+        # Risk percent across the training range of field, scored in one batch. The
+        # curve does not depend on the swept field's own value, so editing that field
+        # reuses it and only other edits rescore.
+        key = (field, n_points, answers_key(dict(answers, **{field: 0})))
+        with self.lock, timer('predict.sweep'):
+            self.check_artifact()
+            curve = self.sweep_cache.get(key)
+            if curve is None:
+                values = self.sweep_values(field, n_points)
+                X = self.encoder.encode_sweep(answers, field, values)
+                curve = (values, np.round(self.forest.predict_proba(X)[:, 1] * 100, 1))
+                self.sweep_cache.put(key, curve)
+        return curve
+
+    def build_explainer(self):
+        # Built on first use rather than at load: it walks every root-to-leaf path
+        if self.explainer is None:
+            from hdp_explain import ForestExplainer
+
+            self.explainer = ForestExplainer(self.forest, self.encoder.feature_columns)
+        return self.explainer
+
+    def warm_explainer(self):
+        with self.lock:
+            self.build_explainer()
+
+    def explain(self, answers):
+        # Average risk percent and each field's contribution in percentage points;
+        # the contributions add up to this patient's risk minus the average
+        with self.lock, timer('predict.explain'):
+            self.check_artifact()
+            X = self.encoder.encode(answers, out=self.input_buffer)
+            base, contributions = self.build_explainer().explain(X)
+        return base * 100, dict(zip(FEATURES, (contributions[0] * 100).tolist()))
+
+    def risk_percent(self, answers, observe=False):
+        return round(float(self.predict_proba(answers, observe)[0]) * 100, 1)
+
+    def risk_percents(self, records, observe=False):
+        return np.round(self.predict_proba(records, observe) * 100, 1)
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor(data_path=DATA_PATH, artifact_dir=ARTIFACT_DIR, n_jobs=None, cache_size=1024):
+    # One model per process, shared by every window and language
+    global _predictor
+    with _predictor_lock:
+        if _predictor is None:
+            forest, encoder = load_predictor(data_path, artifact_dir=artifact_dir, n_jobs=n_jobs)
+            _predictor = Predictor(forest, encoder, artifact_dir, cache_size)
+        return _predictor
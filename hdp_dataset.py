@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Bump when the on-disk layout of the column cache changes
+DATASET_CACHE_VERSION = 1
+CHUNK_ROWS = 1_000_000
+
+
+# Columnar cache of the preprocessed dataset: one .npy per column, categoricals as
+# small integer codes, the RestingBP/Cholesterol zero filter already applied.
+# Columns are memory-mapped on load; the cache is rebuilt when the CSV changes,
+# and only the appended tail is parsed when the CSV grew by appending.
+class DatasetCache:
+    def __init__(self, csv_path, cache_root):
+        self.csv_path = csv_path
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        path_hash = hashlib.sha256(os.path.abspath(csv_path).encode()).hexdigest()[:12]
+        self.path = os.path.join(cache_root, f"{name}-{path_hash}")
+        self.meta_path = os.path.join(self.path, 'meta.json')
+
+    def read_meta(self):
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get('version') == DATASET_CACHE_VERSION else None
+
+    def write_meta(self, meta):
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def column_path(self, column):
+        return os.path.join(self.path, f"{column}.npy")
+
+    def load_columns(self, mmap_mode='r'):
+        # Returns ({column: array}, {column: categories}, meta), rebuilding if stale
+        from hdp_model import file_hash, hash_prefix
+
+        stat = os.stat(self.csv_path)
+        meta = self.read_meta()
+        if meta is not None and (meta['size'], meta['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+            if meta['size'] == stat.st_size and file_hash(self.csv_path) == meta['sha256']:
+                # Touched but unchanged
+                meta['mtime_ns'] = stat.st_mtime_ns
+                self.write_meta(meta)
+            elif stat.st_size > meta['size'] and hash_prefix(self.csv_path, meta['size']) == meta['sha256']:
+                meta = self.append(meta, stat)
+            else:
+                meta = None
+        if meta is None:
+            meta = self.build(stat)
+
+        columns = {column: np.load(self.column_path(column), mmap_mode=mmap_mode) for column in meta['columns']}
+        return columns, meta['categories'], meta
+
+    def build(self, stat):
+        import pandas as pd
+
+        parts, categories, column_order = self.parse(pd.read_csv(self.csv_path, chunksize=CHUNK_ROWS), {})
+        return self.write(parts, categories, column_order, stat, previous=None)
+
+    def append(self, meta, stat):
+        import pandas as pd
+
+        column_order = meta['columns']
+        with open(self.csv_path, 'rb') as f:
+            f.seek(meta['size'])
+            reader = pd.read_csv(f, header=None, names=column_order, chunksize=CHUNK_ROWS)
+            parts, categories, _ = self.parse(reader, {c: list(v) for c, v in meta['categories'].items()})
+        return self.write(parts, categories, column_order, stat, previous=meta)
+
+    def parse(self, reader, categories):
+        # categories maps column -> values in code order; new values get the next codes,
+        # so codes already on disk stay valid when rows are appended
+        from pandas.api.types import is_numeric_dtype
+
+        from hdp_model import drop_zero_vitals
+
+        parts = {}
+        column_order = None
+        for chunk in reader:
+            chunk = drop_zero_vitals(chunk)
+            column_order = list(chunk.columns)
+            for column in column_order:
+                values = chunk[column]
+                if not is_numeric_dtype(values) or column in categories:
+                    known = categories.setdefault(column, [])
+                    known.extend(v for v in values.dropna().unique() if v not in known)
+                    lookup = {value: code for code, value in enumerate(known)}
+                    codes = values.map(lookup).fillna(-1).to_numpy(dtype=np.int64)
+                    parts.setdefault(column, []).append(codes)
+                else:
+                    parts.setdefault(column, []).append(values.to_numpy())
+        return parts, categories, column_order
+
+    def write(self, parts, categories, column_order, stat, previous):
+        from hdp_model import file_hash
+
+        column_order = column_order or previous['columns']
+        os.makedirs(self.path, exist_ok=True)
+        # Removing the metadata first means a crash mid-write forces a rebuild
+        if os.path.exists(self.meta_path):
+            os.remove(self.meta_path)
+        rows = previous['rows'] if previous else 0
+        for column in column_order:
+            chunks = parts.get(column, [])
+            if previous:
+                chunks = [np.load(self.column_path(column))] + chunks
+            if not chunks:
+                continue
+            values = compact(np.concatenate(chunks))
+            tmp_path = os.path.join(self.path, f"{column}.tmp.npy")
+            np.save(tmp_path, values)
+            os.replace(tmp_path, self.column_path(column))
+            rows = len(values)
+
+        meta = {
+            'version': DATASET_CACHE_VERSION,
+            'source': os.path.abspath(self.csv_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_hash(self.csv_path),
+            'rows': int(rows),
+            'columns': column_order,
+            'categories': categories,
+        }
+        self.write_meta(meta)
+        return meta
+
+
+def compact(values):
+    # Smallest integer dtype that holds the column exactly; floats are kept as they are
+    if values.dtype.kind == 'i' and len(values):
+        for dtype in (np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if info.min <= values.min() and values.max() <= info.max:
+                return values.astype(dtype)
+    return values
+
+
+def load_frame(csv_path, cache_root):
+    import pandas as pd
+
+    columns, categories, meta = DatasetCache(csv_path, cache_root).load_columns()
+    data = {}
+    for column in meta['columns']:
+        if column in categories:
+            # Sorted categories give the same dummy column order as get_dummies on strings
+            values = pd.Categorical.from_codes(np.asarray(columns[column]), categories[column])
+            data[column] = values.reorder_categories(sorted(categories[column]))
+        else:
+            data[column] = np.asarray(columns[column])
+    return pd.DataFrame(data)
@@ -0,0 +1,317 @@
+import atexit
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+
+from hdp_model import CATEGORICAL_COLS, FEATURES
+
+# Histogram bins per numeric field; fields with fewer distinct values get one bin each
+N_BINS = 10
+# Floor on bin proportions, so an empty bin on either side keeps PSI finite
+PSI_EPSILON = 1e-4
+# Per-field counters kept next to the histograms
+COUNTERS = ['invalid', 'zero', 'unknown', 'below_min', 'above_max']
+
+
+def numeric_edges(values, n_bins=N_BINS):
+    # Interior bin edges; bin i holds edges[i-1] < x <= edges[i]
+    distinct = np.unique(values)
+    if len(distinct) <= n_bins:
+        return (distinct[:-1] + distinct[1:]) / 2
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+
+def reference_profile(df, n_bins=N_BINS):
+    # Training distribution of every input field, as stored in the artifact metadata
+    fields = {}
+    for field in FEATURES:
+        if field in CATEGORICAL_COLS:
+            counts = df[field].astype(str).value_counts()
+            fields[field] = {
+                'kind': 'categorical',
+                'categories': counts.index.tolist(),
+                'proportions': (counts / counts.sum()).tolist(),
+            }
+        else:
+            values = df[field].to_numpy(dtype=np.float64)
+            edges = numeric_edges(values, n_bins)
+            counts = np.bincount(np.searchsorted(edges, values), minlength=len(edges) + 1)
+            fields[field] = {
+                'kind': 'numeric',
+                'edges': edges.tolist(),
+                'proportions': (counts / counts.sum()).tolist(),
+                'min': float(values.min()),
+                'max': float(values.max()),
+                'zero_rate': float(np.mean(values == 0)),
+            }
+    return {'rows': int(len(df)), 'fields': fields}
+
+
+def to_float(values):
+    # Missing or unparseable values become NaN and count as invalid
+    try:
+        # Numbers, numeric strings and None convert in one call
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        pass
+    out = np.empty(len(values), dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            out[i] = float(value) if value is not None and value != '' else np.nan
+        except (TypeError, ValueError):
+            out[i] = np.nan
+    return out
+
+
+def category_codes(values, lookup, unknown):
+    # Index of each value's category, unknown for unseen ones and -1 when missing
+    try:
+        codes = np.array([lookup.get(value, -2) for value in values], dtype=np.int64)
+    except TypeError:
+        codes = np.full(len(values), -2, dtype=np.int64)
+    for i in np.flatnonzero(codes == -2):
+        value = values[i]
+        codes[i] = -1 if value is None or value == '' else lookup.get(str(value), unknown)
+    return codes
+
+
+def psi(observed, expected):
+    p = np.maximum(observed, PSI_EPSILON)
+    q = np.maximum(expected, PSI_EPSILON)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+# Constant-memory comparison of incoming records with the training reference. Every
+# field's bin counts and counters share one flat vector, so a batch of records is folded
+# in with a single bincount. Single records are buffered and folded flush_rows at a time,
+# which keeps the per-request cost to a list append. Totals cover everything seen; the
+# recent window is a ring of blocks of at most block_rows records, the oldest dropped as
+# a new one starts, so it always holds the last window_rows records.
+class DriftMonitor:
+    def __init__(self, reference, window_rows=10000, block_rows=1000, flush_rows=256):
+        self.reference = reference
+        self.fields = []
+        offset = 0
+        for field in FEATURES:
+            spec = reference['fields'][field]
+            if spec['kind'] == 'numeric':
+                n_bins = len(spec['edges']) + 1
+                lookup = np.asarray(spec['edges'])
+            else:
+                # One extra bin for categories never seen in training
+                n_bins = len(spec['categories']) + 1
+                lookup = {category: i for i, category in enumerate(spec['categories'])}
+            expected = np.zeros(n_bins)
+            expected[:len(spec['proportions'])] = spec['proportions']
+            self.fields.append((field, spec, offset, n_bins, lookup, expected))
+            offset += n_bins
+        self.counter_offset = offset
+        self.width = offset + len(FEATURES) * len(COUNTERS)
+
+        self.block_rows = block_rows
+        self.flush_rows = flush_rows
+        self.totals = np.zeros(self.width, dtype=np.int64)
+        self.blocks = np.zeros((max(1, -(-window_rows // block_rows)), self.width), dtype=np.int64)
+        self.block_counts = np.zeros(len(self.blocks), dtype=np.int64)
+        self.block = 0
+        self.records = 0
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def counter(self, index, name):
+        return self.counter_offset + index * len(COUNTERS) + COUNTERS.index(name)
+
+    def observe(self, records):
+        # Records as dicts of raw values; cheap enough for every prediction request
+        if isinstance(records, dict):
+            records = [records]
+        self.pending.extend(records)
+        if len(self.pending) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if pending:
+                self.fold(self.record_columns(pending), len(pending))
+
+    def record_columns(self, records):
+        # Per field: floats (NaN when invalid) or category codes (-1 when missing)
+        missing = (None,) * len(FEATURES)
+        rows = [tuple(map(record.get, FEATURES)) if isinstance(record, dict) else missing for record in records]
+        columns = {}
+        for (field, spec, offset, n_bins, lookup, _), values in zip(self.fields, zip(*rows)):
+            if spec['kind'] == 'numeric':
+                columns[field] = to_float(values)
+            else:
+                columns[field] = category_codes(values, lookup, n_bins - 1)
+        return columns
+
+    def observe_columns(self, frame):
+        # A whole DataFrame at once, vectorized for batch scoring
+        import pandas as pd
+
+        columns = {}
+        for field, spec, offset, n_bins, lookup, _ in self.fields:
+            column = frame[field]
+            if spec['kind'] == 'numeric':
+                columns[field] = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64)
+            else:
+                codes = pd.Index(spec['categories']).get_indexer(column).astype(np.int64)
+                codes[codes < 0] = n_bins - 1
+                codes[pd.isna(column).to_numpy()] = -1
+                columns[field] = codes
+        with self.lock:
+            self.fold(columns, len(frame))
+
+    def fold(self, columns, n_rows):
+        counts = self.bin_counts(columns, 0, n_rows)
+        self.totals += counts
+        self.records += n_rows
+        # Large inputs are split across blocks. At a block boundary, whole turns of the
+        # ring that later rows of the input overwrite anyway are skipped.
+        start = 0
+        turn = len(self.blocks) * self.block_rows
+        while start < n_rows:
+            if self.block_counts[self.block] >= self.block_rows:
+                start += max(0, (n_rows - start) // turn - 1) * turn
+                self.block = (self.block + 1) % len(self.blocks)
+                self.blocks[self.block] = 0
+                self.block_counts[self.block] = 0
+            stop = min(n_rows, start + self.block_rows - int(self.block_counts[self.block]))
+            self.blocks[self.block] += counts if stop - start == n_rows else self.bin_counts(columns, start, stop)
+            self.block_counts[self.block] += stop - start
+            start = stop
+
+    def bin_counts(self, columns, start, stop):
+        # Bin and counter increments of rows start:stop, as one vector
+        n_rows = stop - start
+        indices, increments = [], []
+        for index, (field, spec, offset, n_bins, lookup, _) in enumerate(self.fields):
+            values = columns[field][start:stop]
+            if spec['kind'] == 'numeric':
+                x = values[np.isfinite(values)]
+                indices.append(offset + np.searchsorted(lookup, x))
+                counters = (('invalid', n_rows - len(x)), ('zero', np.count_nonzero(x == 0)),
+                            ('below_min', np.count_nonzero(x < spec['min'])),
+                            ('above_max', np.count_nonzero(x > spec['max'])))
+            else:
+                valid = values >= 0
+                indices.append(offset + values[valid])
+                counters = (('invalid', n_rows - np.count_nonzero(valid)),
+                            ('unknown', np.count_nonzero(values == n_bins - 1)))
+            increments += [(self.counter(index, name), count) for name, count in counters]
+        counts = np.bincount(np.concatenate(indices), minlength=self.width)
+        for position, count in increments:
+            counts[position] += count
+        return counts
+
+    def field_stats(self, counts, n_records):
+        stats = {}
+        for index, (field, spec, offset, n_bins, _, expected) in enumerate(self.fields):
+            bins = counts[offset:offset + n_bins]
+            valid = int(bins.sum())
+            entry = {name: int(counts[self.counter(index, name)]) for name in COUNTERS}
+            entry['records'] = int(n_records)
+            if spec['kind'] == 'categorical':
+                del entry['zero'], entry['below_min'], entry['above_max']
+            else:
+                del entry['unknown']
+            if valid:
+                observed = bins / valid
+                entry['psi'] = round(psi(observed, expected), 6)
+                if spec['kind'] == 'numeric':
+                    # KS distance between the binned distributions, a lower bound on the exact one
+                    entry['ks'] = round(float(np.max(np.abs(np.cumsum(observed) - np.cumsum(expected)))), 6)
+            stats[field] = entry
+        return stats
+
+    def snapshot(self):
+        self.flush()
+        with self.lock:
+            totals, window = self.totals.copy(), self.blocks.sum(axis=0)
+            records, window_records = self.records, int(self.block_counts.sum())
+        return {
+            'records': records,
+            'window_records': window_records,
+            'reference_rows': self.reference['rows'],
+            'fields': self.field_stats(totals, records),
+            'window': self.field_stats(window, window_records),
+        }
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix='hdp'):
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_input_records_total Records seen by the drift monitor.",
+                 f"# TYPE {prefix}_input_records_total counter",
+                 f"{prefix}_input_records_total {snapshot['records']}"]
+        for name in COUNTERS:
+            metric = f"{prefix}_input_{name}_total"
+            lines += [f"# HELP {metric} Input values per field counted as {name}.", f"# TYPE {metric} counter"]
+            lines += [f'{metric}{{field="{field}"}} {entry[name]}'
+                      for field, entry in snapshot['fields'].items() if name in entry]
+        for score in ('psi', 'ks'):
+            metric = f"{prefix}_drift_{score}"
+            lines += [f"# HELP {metric} {score.upper()} of inputs against the training distribution.",
+                      f"# TYPE {metric} gauge"]
+            for scope in ('fields', 'window'):
+                span = 'all' if scope == 'fields' else 'recent'
+                lines += [f'{metric}{{field="{field}",span="{span}"}} {entry[score]:.6g}'
+                          for field, entry in snapshot[scope].items() if score in entry]
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        # '-' is stderr, like Metrics.dump
+        text = self.to_json() + '\n'
+        if path == '-':
+            sys.stderr.write(text)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+
+_settings = {'enabled': False, 'window_rows': 10000}
+_monitor = None
+
+
+def dump_monitor(path):
+    if _monitor is not None:
+        _monitor.dump(path)
+
+
+def configure(enabled=True, window_rows=10000):
+    global _monitor
+    _settings.update(enabled=enabled, window_rows=window_rows)
+    _monitor = None
+
+
+def configure_from_env(environ=os.environ):
+    # HDP_DRIFT=1 monitors every scored record against the training reference;
+    # HDP_DRIFT_WINDOW sets the recent window in records, HDP_DRIFT_OUT=path writes
+    # the final snapshot at exit
+    configure(environ.get('HDP_DRIFT', '') not in ('', '0'), int(environ.get('HDP_DRIFT_WINDOW', 10000)))
+    if _settings['enabled'] and environ.get('HDP_DRIFT_OUT'):
+        atexit.register(dump_monitor, environ['HDP_DRIFT_OUT'])
+
+
+def start_monitor(reference):
+    # The process-wide monitor for this reference; None while monitoring is off or the
+    # artifact has no reference. A new reference (a retrained model) starts over.
+    global _monitor
+    if not _settings['enabled'] or reference is None:
+        return None
+    if _monitor is None or _monitor.reference != reference:
+        _monitor = DriftMonitor(reference, _settings['window_rows'])
+    return _monitor
+
+
+def get_monitor():
+    return _monitor
+
+
+configure_from_env()
@@ -0,0 +1,118 @@
+from operator import itemgetter
+
+import numpy as np
+
+from hdp_model import CATEGORICAL_COLS
+
+# From this many records encode() transposes them into columns, a fixed cost of tens
+# of microseconds that pays off against filling the rows one by one
+COLUMNS_MIN_ROWS = 32
+
+
+class CategoryColumns(dict):
+    # Category -> encoded column, -1 for unknown categories; other values are looked up
+    # by their text, as encode_into does
+    def __missing__(self, key):
+        return -1 if isinstance(key, str) else self.get(str(key), -1)
+
+
+# One-hot encodes and MinMax-scales patient records without pandas. The output is
+# bit-identical to pd.get_dummies + reindex + MinMaxScaler.transform: both compute
+# x * scale_ + min_ in float64.
+class FeatureEncoder:
+    def __init__(self, feature_columns, scale, min_):
+        self.feature_columns = list(feature_columns)
+        self.n_features = len(self.feature_columns)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.min = np.asarray(min_, dtype=np.float64)
+        # Scaled value of a dummy column that is set; unset dummies stay at min
+        self.hot = 1.0 * self.scale + self.min
+
+        self.numeric = []
+        self.categories = {field: {} for field in CATEGORICAL_COLS}
+        for idx, col in enumerate(self.feature_columns):
+            field = next((f for f in CATEGORICAL_COLS if col.startswith(f + '_')), None)
+            if field is None:
+                self.numeric.append((col, idx))
+            else:
+                self.categories[field][col[len(field) + 1:]] = idx
+        self.category_columns = {field: CategoryColumns(offsets) for field, offsets in self.categories.items()}
+
+    @classmethod
+    def from_scaler(cls, scaler, feature_columns):
+        return cls(feature_columns, scaler.scale_, scaler.min_)
+
+    def empty(self, n_rows=1):
+        return np.empty((n_rows, self.n_features), dtype=np.float64)
+
+    def encode_into(self, answers, row):
+        row[:] = self.min
+        for field, idx in self.numeric:
+            row[idx] = float(answers[field]) * self.scale[idx] + self.min[idx]
+        for field, offsets in self.categories.items():
+            idx = offsets.get(str(answers[field]))
+            # Unknown categories encode as all-zero dummies, like get_dummies + reindex
+            if idx is not None:
+                row[idx] = self.hot[idx]
+        return row
+
+    def encode(self, records, out=None):
+        if isinstance(records, dict):
+            records = [records]
+        if len(records) >= COLUMNS_MIN_ROWS:
+            return self.encode_records(records, out)
+        if out is None:
+            out = self.empty(len(records))
+        for i, answers in enumerate(records):
+            self.encode_into(answers, out[i])
+        return out[:len(records)]
+
+    def encode_records(self, records, out=None):
+        # encode() for many records: one pass per field instead of one per row and field
+        n_rows = len(records)
+        out = self.empty(n_rows) if out is None else out[:n_rows]
+        out[:] = self.min
+        for field, idx in self.numeric:
+            values = np.fromiter(map(itemgetter(field), records), dtype=np.float64, count=n_rows)
+            np.multiply(values, self.scale[idx], out=out[:, idx])
+            out[:, idx] += self.min[idx]
+        rows = np.arange(n_rows)
+        for field, columns in self.category_columns.items():
+            idx = np.fromiter(map(columns.__getitem__, map(itemgetter(field), records)), dtype=np.intp,
+                              count=n_rows)
+            known = idx >= 0
+            out[rows[known], idx[known]] = self.hot[idx[known]]
+        return out
+
+    def value_range(self, field):
+        # Training min/max of a numeric field, recovered from the MinMax parameters
+        idx = self.feature_columns.index(field)
+        low = -self.min[idx] / self.scale[idx]
+        return low, low + 1.0 / self.scale[idx]
+
+    def encode_sweep(self, answers, field, values):
+        # One row per value of field, every other field fixed at answers
+        idx = self.feature_columns.index(field)
+        out = np.repeat(self.encode(answers), len(values), axis=0)
+        np.multiply(np.asarray(values, dtype=np.float64), self.scale[idx], out=out[:, idx])
+        out[:, idx] += self.min[idx]
+        return out
+
+    def encode_columns(self, columns, out=None):
+        # Vectorized path for column-oriented batches (DataFrame or dict of arrays)
+        n_rows = len(columns[self.numeric[0][0]])
+        if out is None:
+            out = self.empty(n_rows)
+        out = out[:n_rows]
+        out[:] = self.min
+        for field, idx in self.numeric:
+            values = np.asarray(columns[field], dtype=np.float64)
+            np.multiply(values, self.scale[idx], out=out[:, idx])
+            out[:, idx] += self.min[idx]
+        for field, offsets in self.categories.items():
+            values = np.asarray(columns[field])
+            if values.dtype.kind not in 'OU':
+                values = values.astype(str)
+            for category, idx in offsets.items():
+                out[values == category, idx] = self.hot[idx]
+        return out
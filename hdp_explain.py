@@ -0,0 +1,132 @@
+import numpy as np
+
+from hdp_model import CATEGORICAL_COLS, FEATURES
+
+# Leaves are grouped by the number of distinct features on their path, padded up to
+# a multiple of this; padding slots are neutral, so it only trades work for calls
+PATH_GROUP = 4
+# Rows are explained in blocks of about this many path slots x quadrature nodes x
+# leaves, which keeps the temporaries in cache; a block always has at least one row
+BLOCK_CELLS = 100_000
+
+
+def leaf_paths(forest, n_features):
+    # For every node: the (lo, hi] interval each feature is confined to on the way
+    # there, and the product of cover ratios of the edges that split on it
+    n_nodes = len(forest.feature)
+    lo = np.full((n_nodes, n_features), -np.inf)
+    hi = np.full((n_nodes, n_features), np.inf)
+    zero = np.ones((n_nodes, n_features))
+    used = np.zeros((n_nodes, n_features), dtype=bool)
+
+    frontier = np.asarray(forest.roots, dtype=np.intp)
+    leaves = []
+    while len(frontier):
+        is_leaf = forest.feature[frontier] < 0
+        leaves.append(frontier[is_leaf])
+        parents = frontier[~is_leaf]
+        features = forest.feature[parents]
+        thresholds = forest.threshold[parents]
+        cover = forest.cover[parents]
+        # Left means x <= threshold, right means x > threshold
+        for children, bound, limit in ((forest.left[parents], hi, np.minimum),
+                                       (forest.right[parents], lo, np.maximum)):
+            lo[children], hi[children] = lo[parents], hi[parents]
+            zero[children], used[children] = zero[parents], used[parents]
+            bound[children, features] = limit(bound[children, features], thresholds)
+            zero[children, features] *= forest.cover[children] / cover
+            used[children, features] = True
+        frontier = np.concatenate([forest.left[parents], forest.right[parents]])
+    leaves = np.concatenate(leaves)
+    return leaves, lo[leaves], hi[leaves], zero[leaves], used[leaves]
+
+
+# Exact path-dependent TreeSHAP for a FlatForest (Lundberg et al. 2018), vectorized
+# over leaves. For a leaf with value v and d distinct features on its path, let
+# o_j = 1 when x satisfies every split on feature j and z_j be the cover fraction of
+# those splits. Feature i then receives
+#     v * (o_i - z_i) * sum_s s!(d-s-1)!/d! * [t^s] prod_{j != i} (z_j + o_j t)
+#   = v * (o_i - z_i) * integral_0^1 prod_{j != i} (z_j (1 - u) + o_j u) du,
+# a polynomial of degree d - 1 in u that Gauss-Legendre quadrature with d/2 nodes
+# integrates exactly. Path structures are built once; explaining is a handful of
+# array passes per group of leaves.
+class ForestExplainer:
+    def __init__(self, forest, feature_columns):
+        if forest.cover is None:
+            raise ValueError("the forest has no node covers; retrain to explain predictions")
+        self.feature_columns = list(feature_columns)
+        n_features = len(self.feature_columns)
+        leaves, lo, hi, zero, used = leaf_paths(forest, n_features)
+        value = forest.value[leaves, 1] / forest.n_estimators
+        # Expected output: every leaf weighted by the share of training samples reaching it
+        self.expected_value = float(np.sum(value * np.prod(zero, axis=1)))
+
+        widths = -(-np.maximum(used.sum(axis=1), 1) // PATH_GROUP) * PATH_GROUP
+        self.groups = []
+        for width in np.unique(widths):
+            members = np.flatnonzero(widths == width)
+            # Each leaf's path features first, then padding slots
+            slots = np.argsort(~used[members], axis=1, kind='stable')[:, :width]
+            valid = np.take_along_axis(used[members], slots, axis=1)
+
+            def pick(array, padding):
+                return np.where(valid, np.take_along_axis(array[members], slots, axis=1), padding).T.copy()
+
+            nodes, node_weights = np.polynomial.legendre.leggauss(width // 2)
+            u = (nodes + 1) / 2
+            # Padding slots get z = o = 1: a factor of exactly 1 and no contribution
+            zero_slots = pick(zero, 1.0)
+            feature = slots.T.copy()
+            # Path slots sorted by feature, so contributions reduce to columns in one call
+            order = np.argsort(np.where(valid.T, feature, n_features).ravel(), kind='stable')[:valid.sum()]
+            columns, starts = np.unique(feature.ravel()[order], return_index=True)
+            # Stored slot-major, (width, ...), so every array pass runs over the long leaf axis
+            self.groups.append({
+                'feature': feature,
+                'lo': pick(lo, -np.inf),
+                'hi': pick(hi, np.inf),
+                'zero': zero_slots,
+                'zero_u': zero_slots[:, np.newaxis, :] * (1 - u)[:, np.newaxis],
+                'u': u[:, np.newaxis, np.newaxis],
+                'node_weights': (node_weights / 2)[:, np.newaxis, np.newaxis],
+                'value': value[members],
+                'order': order,
+                'columns': columns,
+                'starts': starts,
+            })
+
+        # Sums one-hot dummy columns back into the field they encode
+        self.fields = list(FEATURES)
+        self.fold = np.zeros((n_features, len(self.fields)))
+        for idx, col in enumerate(self.feature_columns):
+            field = next((f for f in CATEGORICAL_COLS if col.startswith(f + '_')), col)
+            self.fold[idx, self.fields.index(field)] = 1.0
+
+    def shap_values(self, X):
+        # Contributions to P(class 1) per encoded column; row sums plus expected_value
+        # reproduce predict_proba[:, 1]. Compared as float32, like the forest.
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float32).astype(np.float64)
+        phi = np.zeros((len(X), len(self.feature_columns)))
+        for group in self.groups:
+            width, n_leaves = group['feature'].shape
+            block = max(1, BLOCK_CELLS // (width * width // 2 * n_leaves))
+            for start in range(0, len(X), block):
+                self.add_group(X[start:start + block], group, phi[start:start + block])
+        return phi
+
+    def add_group(self, X, group, phi):
+        # Arrays are (path slot, quadrature node, row, leaf)
+        x = X[:, group['feature']].transpose(1, 0, 2)
+        one = ((x > group['lo'][:, np.newaxis]) & (x <= group['hi'][:, np.newaxis])).astype(np.float64)
+        factors = group['zero_u'][:, :, np.newaxis, :] + one[:, np.newaxis] * group['u']
+        weighted = np.prod(factors, axis=0) * group['node_weights']
+        # Leave-one-out products by division; every factor is positive inside (0, 1)
+        total = np.sum(weighted / factors, axis=1)
+
+        contribution = group['value'] * (one - group['zero'][:, np.newaxis]) * total
+        contribution = contribution.transpose(1, 0, 2).reshape(len(X), -1)
+        phi[:, group['columns']] += np.add.reduceat(contribution[:, group['order']], group['starts'], axis=1)
+
+    def explain(self, X):
+        # (expected value, contributions per field), both as probabilities of class 1
+        return self.expected_value, self.shap_values(X) @ self.fold
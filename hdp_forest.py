@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+
+FOREST_ARRAYS = ['feature', 'threshold', 'left', 'right', 'value', 'roots', 'cover']
+
+
+# A RandomForestClassifier flattened into contiguous node arrays. All trees share
+# one node index space; leaves have feature -1 and point to themselves, so every
+# tree can be walked for max_depth levels in lock-step with plain array operations.
+class FlatForest:
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, children=None,
+                 cover=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        # Weighted training samples reaching each node; only needed for explanations
+        self.cover = cover
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.n_estimators = len(roots)
+        # Interleaved (left, right) pairs so a branch is a single gather
+        self.children = np.stack([left, right], axis=1).ravel() if children is None else children
+
+    @classmethod
+    def from_sklearn(cls, model):
+        features, thresholds, lefts, rights, values, roots, covers = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, -1, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, ids, tree.children_right + offset).astype(np.int32))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            value = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(value / normalizer)
+            covers.append(tree.weighted_n_node_samples.astype(np.float64))
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(np.concatenate(features), np.concatenate(thresholds),
+                   np.concatenate(lefts), np.concatenate(rights),
+                   np.concatenate(values), np.asarray(roots, dtype=np.int32),
+                   max_depth, model.classes_, cover=np.concatenate(covers))
+
+    def apply(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        node = np.tile(self.roots.astype(np.intp), n_rows)
+        row_offset = np.repeat(np.arange(0, n_rows * n_features, n_features), self.n_estimators)
+        # Only (row, tree) pairs that have not reached a leaf are advanced
+        active = np.arange(len(node))
+        for _ in range(self.max_depth):
+            current = node[active]
+            go_right = flat_X[row_offset[active] + self.feature[current]] > self.threshold[current]
+            current = self.children[2 * current + go_right]
+            node[active] = current
+            active = active[self.feature[current] >= 0]
+            if not len(active):
+                break
+        return node.reshape(n_rows, self.n_estimators)
+
+    def predict_proba(self, X, block_rows=4096, out=None):
+        X = np.atleast_2d(X)
+        if out is None:
+            out = np.empty((len(X), self.value.shape[1]), dtype=np.float64)
+        # Blocks keep the (rows x trees) index arrays cache-sized for large inputs
+        for start in range(0, len(X), block_rows):
+            leaves = self.apply(X[start:start + block_rows])
+            out[start:start + block_rows] = self.value[leaves].sum(axis=1) / self.n_estimators
+        return out
+
+    def save(self, path):
+        # Every file is written beside the old one and renamed over it: processes that have
+        # the previous forest memory-mapped keep reading the old file, never a mix of both
+        os.makedirs(path, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in FOREST_ARRAYS}
+        arrays.update(classes=self.classes_, max_depth=np.asarray(self.max_depth))
+        for name, array in arrays.items():
+            tmp_path = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in FOREST_ARRAYS}
+        classes = np.load(os.path.join(path, 'classes.npy'))
+        max_depth = np.load(os.path.join(path, 'max_depth.npy'))
+        # A load that raced a save can see files of two forests
+        n_nodes = len(arrays['feature'])
+        if any(len(arrays[name]) != n_nodes for name in FOREST_ARRAYS if name != 'roots') or \
+                (len(arrays['roots']) and int(arrays['roots'][-1]) >= n_nodes):
+            raise ValueError(f"{path} holds arrays of different forests")
+        return cls(max_depth=max_depth, classes=classes, **arrays)
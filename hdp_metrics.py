@@ -0,0 +1,216 @@
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Returned by timer()/profiled() while instrumentation is off, so the hot path pays
+# one function call and an empty with-block
+_NULL = nullcontext()
+
+
+class LatencyStats:
+    def __init__(self, window=10000):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.requests += 1
+        self.total += seconds
+
+    def quantiles(self):
+        # Over the rolling window; count and total cover every sample ever added
+        if not self.samples:
+            return {}
+        values = np.percentile(np.fromiter(self.samples, dtype=np.float64), [q * 100 for q in QUANTILES])
+        return dict(zip(QUANTILES, values.tolist()))
+
+    def summary(self):
+        result = {'requests': self.requests}
+        for q, seconds in self.quantiles().items():
+            result[f"p{round(q * 100)}_ms"] = round(seconds * 1e3, 3)
+        return result
+
+
+def prometheus_text(stages, prefix='hdp'):
+    # stages maps name -> LatencyStats, rendered as one Prometheus summary
+    name = f"{prefix}_stage_seconds"
+    lines = [f"# HELP {name} Wall time per instrumented stage.", f"# TYPE {name} summary"]
+    for stage, stats in sorted(stages.items()):
+        label = stage.replace('\\', '\\\\').replace('"', '\\"')
+        for q, seconds in stats.quantiles().items():
+            lines.append(f'{name}{{stage="{label}",quantile="{q:g}"}} {seconds:.9g}')
+        lines.append(f'{name}_sum{{stage="{label}"}} {stats.total:.9g}')
+        lines.append(f'{name}_count{{stage="{label}"}} {stats.requests}')
+    return '\n'.join(lines) + '\n'
+
+
+# Per-stage timers for the predict and train paths, plus cProfile or tracemalloc
+# capture of a random sample of whole requests. Off unless HDP_METRICS is set.
+class Metrics:
+    def __init__(self, window=10000, profile=None, sample_rate=0.01, seed=None):
+        if profile not in (None, 'cprofile', 'tracemalloc'):
+            raise ValueError(f"unknown profile mode {profile!r}")
+        self.window = window
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.profile = profile
+        self.sample_rate = sample_rate
+        self.random = random.Random(seed)
+        # cProfile and tracemalloc are process-wide; one sampled request at a time
+        self.profile_lock = threading.Lock()
+        self.profile_stats = None
+        self.memory = {}
+        self.top_allocations = []
+        self.profiled_requests = 0
+
+    def record(self, name, seconds):
+        with self.lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = LatencyStats(self.window)
+            stats.add(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @contextmanager
+    def profiled(self, name):
+        # Times a whole request and, for a sample of them, profiles it
+        sample = self.profile is not None and self.random.random() < self.sample_rate
+        if not sample or not self.profile_lock.acquire(blocking=False):
+            with self.timer(name):
+                yield
+            return
+        try:
+            capture = self.capture_cprofile if self.profile == 'cprofile' else self.capture_tracemalloc
+            with capture(name), self.timer(name):
+                yield
+            self.profiled_requests += 1
+        finally:
+            self.profile_lock.release()
+
+    @contextmanager
+    def capture_cprofile(self, name):
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if self.profile_stats is None:
+                self.profile_stats = pstats.Stats(profiler)
+            else:
+                self.profile_stats.add(profiler)
+
+    @contextmanager
+    def capture_tracemalloc(self, name):
+        import tracemalloc
+
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot()
+            if started:
+                tracemalloc.stop()
+            self.memory.setdefault(name, deque(maxlen=self.window)).append(peak)
+            self.top_allocations = [str(stat) for stat in snapshot.statistics('lineno')[:10]]
+
+    def snapshot(self):
+        with self.lock:
+            stages = {name: stats.summary() for name, stats in sorted(self.stages.items())}
+        result = {'stages': stages}
+        if self.profile is not None:
+            result['profile'] = {'mode': self.profile, 'sample_rate': self.sample_rate,
+                                 'profiled_requests': self.profiled_requests}
+        if self.memory:
+            result['memory'] = {name: {'samples': len(peaks), 'peak_bytes_p50': int(np.median(peaks)),
+                                       'peak_bytes_max': int(max(peaks))}
+                                for name, peaks in sorted(self.memory.items())}
+            result['top_allocations'] = self.top_allocations
+        return result
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def stage_stats(self):
+        with self.lock:
+            return dict(self.stages)
+
+    def to_prometheus(self):
+        return prometheus_text(self.stage_stats())
+
+    def dump(self, path):
+        # .prom/.txt gets Prometheus text, anything else JSON; '-' is stderr
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json() + '\n'
+        if path == '-':
+            sys.stderr.write(text)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    def dump_profile(self, path):
+        if self.profile_stats is not None:
+            self.profile_stats.dump_stats(path)
+
+
+_metrics = None
+
+
+def configure(enabled=True, window=10000, profile=None, sample_rate=0.01, seed=None):
+    global _metrics
+    _metrics = Metrics(window, profile, sample_rate, seed) if enabled else None
+    return _metrics
+
+
+def configure_from_env(environ=os.environ):
+    # HDP_METRICS=1 turns timing on; HDP_METRICS_OUT=path writes it at exit;
+    # HDP_PROFILE=cprofile|tracemalloc samples HDP_PROFILE_SAMPLE of the requests,
+    # and HDP_PROFILE_OUT=path saves the aggregated cProfile stats at exit
+    if environ.get('HDP_METRICS', '') in ('', '0'):
+        return configure(False)
+    metrics = configure(profile=environ.get('HDP_PROFILE') or None,
+                        sample_rate=float(environ.get('HDP_PROFILE_SAMPLE', 0.01)))
+    if environ.get('HDP_METRICS_OUT'):
+        atexit.register(metrics.dump, environ['HDP_METRICS_OUT'])
+    if environ.get('HDP_PROFILE_OUT'):
+        atexit.register(metrics.dump_profile, environ['HDP_PROFILE_OUT'])
+    return metrics
+
+
+def get_metrics():
+    return _metrics
+
+
+def timer(name):
+    return _NULL if _metrics is None else _metrics.timer(name)
+
+
+def profiled(name):
+    return _NULL if _metrics is None else _metrics.profiled(name)
+
+
+configure_from_env()
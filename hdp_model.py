@@ -0,0 +1,374 @@
+import hashlib
+import json
+import os
+
+from hdp_forest import FlatForest
+from hdp_metrics import profiled, timer
+
+# pandas, sklearn and joblib are imported inside the functions that need them.
+# Loading a saved artifact through load_predictor only needs NumPy, which keeps
+# them off the startup path of the GUI and the prediction service.
+
+DATA_PATH = 'heart_disease_prediction.csv'
+ARTIFACT_DIR = 'artifacts'
+# Bump when the layout of the saved artifact changes
+ARTIFACT_VERSION = 5
+
+FEATURES = ['Age', 'Sex', 'ChestPainType', 'RestingBP', 'Cholesterol', 'FastingBS',
+            'RestingECG', 'MaxHR', 'ExerciseAngina', 'Oldpeak', 'ST_Slope']
+CATEGORICAL_COLS = ['Sex', 'ChestPainType', 'RestingECG', 'ExerciseAngina', 'ST_Slope']
+TARGET = 'HeartDisease'
+MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+
+def drop_zero_vitals(df):
+    # The dataset records a missing blood pressure or cholesterol measurement as 0;
+    # those rows are left out of training everywhere the CSV is read
+    return df[(df['RestingBP'] != 0) & (df['Cholesterol'] != 0)]
+
+
+def load_data(path=DATA_PATH, use_cache=True, artifact_dir=ARTIFACT_DIR):
+    import pandas as pd
+
+    with timer('load_data'):
+        if use_cache:
+            from hdp_dataset import load_frame
+
+            try:
+                return load_frame(path, os.path.join(artifact_dir, 'dataset'))
+            except OSError:
+                # Unwritable cache directory: parse the CSV directly
+                pass
+        return drop_zero_vitals(pd.read_csv(path))
+
+
+def encode_frame(df):
+    import pandas as pd
+
+    df_encoded = pd.get_dummies(df, columns=CATEGORICAL_COLS)
+    X = df_encoded.drop(TARGET, axis=1)
+    y = df_encoded[TARGET]
+    return X, y, X.columns.tolist()
+
+
+def train_model(df, params=None, n_jobs=None):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import MinMaxScaler
+
+    params = MODEL_PARAMS if params is None else params
+    with profiled('train'):
+        with timer('train.encode'):
+            X, y, feature_columns = encode_frame(df)
+
+        with timer('train.scale'):
+            scaler = MinMaxScaler()
+            X_scaled = scaler.fit_transform(X)
+
+        with timer('train.fit'):
+            model = RandomForestClassifier(**params, n_jobs=n_jobs)
+            model.fit(X_scaled, y)
+        # n_jobs only affects fitting; keep the saved model identical whoever trained it
+        model.set_params(n_jobs=None)
+
+        with timer('train.reference'):
+            from hdp_drift import reference_profile
+
+            # Saved with the artifact, for comparing live inputs with the training data
+            model.reference_profile_ = reference_profile(df)
+
+    return model, scaler, feature_columns
+
+
+def risk_tier(risk_percent):
+    if risk_percent < 20:
+        return 'low'
+    elif risk_percent < 50:
+        return 'moderate'
+    return 'high'
+
+
+def params_path(artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, 'params.json')
+
+
+def model_params(artifact_dir=ARTIFACT_DIR):
+    # Hyperparameters chosen by `hdp_train.py search --apply` override the defaults
+    try:
+        with open(params_path(artifact_dir), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict(MODEL_PARAMS)
+
+
+def save_model_params(params, artifact_dir=ARTIFACT_DIR):
+    os.makedirs(artifact_dir, exist_ok=True)
+    tmp_path = params_path(artifact_dir) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(params, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, params_path(artifact_dir))
+
+
+def file_hash(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def artifact_key(data_path=DATA_PATH, params=None, data_hash=None):
+    params = MODEL_PARAMS if params is None else params
+    h = hashlib.sha256()
+    h.update((data_hash or file_hash(data_path)).encode())
+    h.update(json.dumps(params, sort_keys=True).encode())
+    h.update(f"v{ARTIFACT_VERSION}".encode())
+    return h.hexdigest()
+
+
+def artifact_paths(artifact_dir=ARTIFACT_DIR):
+    return (os.path.join(artifact_dir, 'model.json'),
+            os.path.join(artifact_dir, 'model.joblib'))
+
+
+def forest_path(artifact_dir=ARTIFACT_DIR):
+    return os.path.join(artifact_dir, 'forest')
+
+
+def read_artifact_meta(artifact_dir=ARTIFACT_DIR):
+    meta_path, _ = artifact_paths(artifact_dir)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != ARTIFACT_VERSION:
+        return None
+    return meta
+
+
+def data_manifest(data_path, df, data_hash=None):
+    # What the artifact has seen, so that update_model can tell an append from a rewrite
+    return {
+        'bytes': os.path.getsize(data_path),
+        'sha256': data_hash or file_hash(data_path),
+        'rows': int(len(df)),
+        'positive_rate': float(df[TARGET].mean()),
+    }
+
+
+def save_artifact(model, scaler, feature_columns, key, params=None, artifact_dir=ARTIFACT_DIR, extra=None):
+    import joblib
+    import sklearn
+
+    os.makedirs(artifact_dir, exist_ok=True)
+    meta_path, blob_path = artifact_paths(artifact_dir)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    with timer('train.save'):
+        # Uncompressed so that numpy arrays inside can be memory-mapped on load
+        tmp_blob = blob_path + '.tmp'
+        joblib.dump({'model': model, 'scaler': scaler}, tmp_blob, compress=0)
+        os.replace(tmp_blob, blob_path)
+        FlatForest.from_sklearn(model).save(forest_path(artifact_dir))
+
+    # The metadata file is written last and acts as the commit marker
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'key': key,
+        'params': MODEL_PARAMS if params is None else params,
+        'feature_columns': list(feature_columns),
+        # Everything load_predictor needs to rebuild the encoder without sklearn
+        'scale': scaler.scale_.tolist(),
+        'min': scaler.min_.tolist(),
+        # The pickled estimators are only valid for the sklearn version that wrote them
+        'sklearn_version': sklearn.__version__,
+        'reference': getattr(model, 'reference_profile_', None),
+    }
+    meta.update(extra or {})
+    tmp_meta = meta_path + '.tmp'
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_meta, meta_path)
+
+
+def load_artifact(artifact_dir=ARTIFACT_DIR, key=None):
+    import joblib
+    import sklearn
+
+    meta = read_artifact_meta(artifact_dir)
+    if meta is None or (key is not None and meta['key'] != key):
+        return None
+    if meta.get('sklearn_version') != sklearn.__version__:
+        return None
+    _, blob_path = artifact_paths(artifact_dir)
+    try:
+        blob = joblib.load(blob_path, mmap_mode='r')
+    except (OSError, EOFError, ValueError):
+        return None
+    return blob['model'], blob['scaler'], meta['feature_columns']
+
+
+def load_model(data_path=DATA_PATH, params=None, artifact_dir=ARTIFACT_DIR, retrain=False, n_jobs=None):
+    params = model_params(artifact_dir) if params is None else params
+    data_hash = file_hash(data_path)
+    key = artifact_key(data_path, params, data_hash)
+    if not retrain:
+        loaded = load_artifact(artifact_dir, key)
+        if loaded is not None:
+            return loaded
+
+    df = load_data(data_path, artifact_dir=artifact_dir)
+    model, scaler, feature_columns = train_model(df, params, n_jobs)
+    try:
+        save_artifact(model, scaler, feature_columns, key, params, artifact_dir,
+                      {'data': data_manifest(data_path, df, data_hash)})
+    except OSError:
+        # A read-only install still works, it just retrains on every launch
+        pass
+    return model, scaler, feature_columns
+
+
+def hash_prefix(path, n_bytes, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = n_bytes
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest()
+
+
+def read_appended_rows(data_path, offset):
+    import pandas as pd
+
+    columns = pd.read_csv(data_path, nrows=0).columns
+    with open(data_path, 'rb') as f:
+        f.seek(offset)
+        tail = pd.read_csv(f, header=None, names=columns)
+    return drop_zero_vitals(tail)
+
+
+def update_model(data_path=DATA_PATH, artifact_dir=ARTIFACT_DIR, trees=None, old_sample_ratio=1.0,
+                 max_growth=0.5, max_out_of_range=0.05, max_rate_shift=0.1, max_rate_z=3.0,
+                 max_tree_factor=3.0, n_jobs=None, seed=0):
+    # Grows the saved forest with trees fitted on rows appended to the CSV since it was
+    # trained, plus a sample of the old rows. Falls back to a full rebuild when the file
+    # was rewritten, the tail is too large or drifts, or the forest has grown too big.
+    import numpy as np
+    import pandas as pd
+
+    params = model_params(artifact_dir)
+    meta = read_artifact_meta(artifact_dir)
+    loaded = load_artifact(artifact_dir)
+    seen = meta.get('data') if meta else None
+
+    def rebuild(reason):
+        load_model(data_path, params, artifact_dir, retrain=True, n_jobs=n_jobs)
+        return {'mode': 'full', 'reason': reason}
+
+    if loaded is None or seen is None:
+        return rebuild("no usable artifact")
+    size = os.path.getsize(data_path)
+    if size < seen['bytes'] or hash_prefix(data_path, seen['bytes']) != seen['sha256']:
+        return rebuild("dataset was modified, not appended to")
+    if size == seen['bytes']:
+        return {'mode': 'unchanged', 'reason': "no new rows"}
+
+    model, scaler, feature_columns = loaded
+    try:
+        tail = read_appended_rows(data_path, seen['bytes'])
+    except (ValueError, pd.errors.ParserError) as e:
+        return rebuild(f"could not parse appended rows: {e}")
+    if len(tail) == 0:
+        return rebuild("appended rows were all filtered out")
+    if len(tail) > max_growth * seen['rows']:
+        return rebuild(f"{len(tail)} new rows exceed {max_growth:.0%} of the {seen['rows']} seen")
+
+    X_new, y_new, new_columns = encode_frame(tail)
+    if not set(new_columns) <= set(feature_columns):
+        return rebuild("new category values appeared")
+    X_new = scaler.transform(X_new.reindex(columns=feature_columns, fill_value=0))
+    out_of_range = float(((X_new < 0) | (X_new > 1)).any(axis=1).mean())
+    if out_of_range > max_out_of_range:
+        return rebuild(f"{out_of_range:.1%} of new rows fall outside the training range")
+    # A shift only counts when it is both large and more than chance for a tail this size:
+    # the binomial z-score of the new positives against the rate seen so far
+    rate = seen['positive_rate']
+    rate_shift = abs(float(y_new.mean()) - rate)
+    rate_z = rate_shift / np.sqrt(max(rate * (1 - rate), 1e-12) / len(tail))
+    if rate_shift > max_rate_shift and rate_z > max_rate_z:
+        return rebuild(f"positive rate moved by {rate_shift:.2f} (z = {rate_z:.1f})")
+
+    base_trees = params.get('n_estimators', MODEL_PARAMS['n_estimators'])
+    if trees is None:
+        trees = max(5, int(np.ceil(base_trees * len(tail) / seen['rows'])))
+    if len(model.estimators_) + trees > max_tree_factor * base_trees:
+        return rebuild(f"forest would exceed {max_tree_factor:g}x its base size")
+
+    # Old rows are re-read but not re-fitted; only a sample joins the new trees' training set
+    old = load_data(data_path, artifact_dir=artifact_dir).head(seen['rows'])
+    n_old = min(len(old), int(old_sample_ratio * len(tail)))
+    old = old.sample(n=n_old, random_state=seed) if n_old else old.iloc[:0]
+    X_old, y_old, _ = encode_frame(old)
+    X_old = scaler.transform(X_old.reindex(columns=feature_columns, fill_value=0))
+
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + trees, n_jobs=n_jobs)
+    model.fit(np.vstack([X_new, X_old]), np.concatenate([y_new.to_numpy(), y_old.to_numpy()]))
+    model.set_params(warm_start=False, n_jobs=None)
+
+    data_hash = file_hash(data_path)
+    rows = seen['rows'] + len(tail)
+    manifest = {
+        'bytes': size,
+        'sha256': data_hash,
+        'rows': rows,
+        'positive_rate': (seen['positive_rate'] * seen['rows'] + float(y_new.sum())) / rows,
+    }
+    updates = meta.get('updates', []) + [{'rows': len(tail), 'trees': trees, 'old_sample': n_old}]
+    save_artifact(model, scaler, feature_columns, artifact_key(data_path, params, data_hash), params,
+                  artifact_dir, {'data': manifest, 'updates': updates})
+    return {'mode': 'incremental', 'reason': f"{len(tail)} new rows, {trees} trees added",
+            'trees': len(model.estimators_)}
+
+
+def load_forest(model, artifact_dir=ARTIFACT_DIR):
+    # The flattened forest is saved next to the model and memory-mapped; fall back
+    # to exporting it in memory when the artifact directory has none
+    try:
+        forest = FlatForest.load(forest_path(artifact_dir))
+    except (OSError, ValueError):
+        return FlatForest.from_sklearn(model)
+    if forest.n_estimators != len(model.estimators_):
+        return FlatForest.from_sklearn(model)
+    return forest
+
+
+def load_saved_predictor(artifact_dir=ARTIFACT_DIR, key=None):
+    # NumPy-only load of whatever artifact is on disk; None if it is missing or not `key`
+    from hdp_encoder import FeatureEncoder
+
+    meta = read_artifact_meta(artifact_dir)
+    if meta is None or (key is not None and meta['key'] != key):
+        return None
+    try:
+        forest = FlatForest.load(forest_path(artifact_dir))
+    except (OSError, ValueError):
+        return None
+    return forest, FeatureEncoder(meta['feature_columns'], meta['scale'], meta['min'])
+
+
+def load_predictor(data_path=DATA_PATH, params=None, artifact_dir=ARTIFACT_DIR, n_jobs=None):
+    from hdp_encoder import FeatureEncoder
+
+    params = model_params(artifact_dir) if params is None else params
+    loaded = load_saved_predictor(artifact_dir, artifact_key(data_path, params))
+    if loaded is not None:
+        return loaded
+
+    # Stale or missing artifact: this is the only path that imports pandas and sklearn
+    model, scaler, feature_columns = load_model(data_path, params, artifact_dir, n_jobs=n_jobs)
+    return load_forest(model, artifact_dir), FeatureEncoder.from_scaler(scaler, feature_columns)
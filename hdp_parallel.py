@@ -0,0 +1,145 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from hdp_forest import FlatForest
+
+# Rows per task; small enough to balance work across workers, large enough that
+# the per-task overhead (a pickled tuple of names and bounds) is negligible
+TASK_ROWS = 16384
+
+# Per-process state of a scoring worker, filled by init_worker
+_worker = {}
+
+
+def attach(name):
+    # Only the parent, which created the block, should unlink it. Before 3.13 attaching
+    # also registers it with the resource tracker, but pool workers share the parent's
+    # tracker, so that registration is a no-op rather than a second owner.
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def pack_arrays(arrays):
+    # One shared block for several arrays; returns it and a picklable layout
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        offset = -(-offset // 64) * 64
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype, buffer=shm.buf, offset=start)[...] = array
+    return shm, layout
+
+
+def unpack_arrays(shm, layout):
+    return {name: np.ndarray(shape, dtype, buffer=shm.buf, offset=start) for name, dtype, shape, start in layout}
+
+
+def forest_from_arrays(arrays, max_depth, classes):
+    # left/right are strided views of the interleaved children, so nothing is copied
+    pairs = arrays['children'].reshape(-1, 2)
+    return FlatForest(arrays['feature'], arrays['threshold'], pairs[:, 0], pairs[:, 1], arrays['value'],
+                      arrays['roots'], max_depth, classes, children=arrays['children'])
+
+
+def init_worker(forest_name, layout, max_depth, classes):
+    shm = attach(forest_name)
+    _worker['forest_shm'] = shm
+    _worker['forest'] = forest_from_arrays(unpack_arrays(shm, layout), max_depth, classes)
+    _worker['buffers'] = {}
+
+
+def worker_buffer(role, name, shape, dtype):
+    # Input/output blocks are attached once and reused until the parent replaces them
+    attached = _worker['buffers'].get(role)
+    if attached is None or attached.name != name:
+        if attached is not None:
+            attached.close()
+        attached = _worker['buffers'][role] = attach(name)
+    return np.ndarray(shape, dtype, buffer=attached.buf)
+
+
+def score_range(input_name, output_name, n_rows, n_features, n_classes, start, stop):
+    X = worker_buffer('input', input_name, (n_rows, n_features), np.float32)
+    out = worker_buffer('output', output_name, (n_rows, n_classes), np.float64)
+    _worker['forest'].predict_proba(X[start:stop], out=out[start:stop])
+    return stop - start
+
+
+class SharedBuffer:
+    # A growable shared-memory array owned by the parent process
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+        self.shm = None
+
+    def view(self, shape):
+        nbytes = int(np.prod(shape)) * self.dtype.itemsize
+        if self.shm is None or self.shm.size < nbytes:
+            self.release()
+            # Grow geometrically so a run of increasing chunk sizes does not reallocate every time
+            self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes + nbytes // 2, 1))
+        return np.ndarray(shape, self.dtype, buffer=self.shm.buf)
+
+    def release(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+# Scores with a FlatForest across worker processes. The forest's node arrays, the
+# encoded input rows and the output probabilities all live in shared memory, so
+# workers hold no copy of the model and score disjoint row ranges in place.
+class ParallelScorer:
+    def __init__(self, forest, workers=None):
+        self.workers = workers or os.cpu_count()
+        self.n_classes = forest.value.shape[1]
+        self.classes_ = forest.classes_
+        arrays = {'feature': forest.feature, 'threshold': forest.threshold, 'children': forest.children,
+                  'value': forest.value, 'roots': forest.roots}
+        self.forest_shm, layout = pack_arrays(arrays)
+        self.input = SharedBuffer(np.float32)
+        self.output = SharedBuffer(np.float64)
+        self.n_features = None
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                        initargs=(self.forest_shm.name, layout, forest.max_depth, forest.classes_))
+
+    def input_buffer(self, n_rows, n_features):
+        # Encode straight into this to skip the copy predict_proba would otherwise make
+        self.n_features = n_features
+        return self.input.view((n_rows, n_features))
+
+    def predict_proba(self, X=None, n_rows=None):
+        # Either pass X, or fill input_buffer(n_rows, ...) first and pass n_rows
+        if X is not None:
+            X = np.atleast_2d(X)
+            n_rows = len(X)
+            self.input_buffer(n_rows, X.shape[1])[...] = X
+        out = self.output.view((n_rows, self.n_classes))
+        if n_rows:
+            tasks = [self.pool.submit(score_range, self.input.shm.name, self.output.shm.name, n_rows,
+                                      self.n_features, self.n_classes, start, min(start + TASK_ROWS, n_rows))
+                     for start in range(0, n_rows, TASK_ROWS)]
+            done, _ = wait(tasks)
+            for task in done:
+                task.result()
+        return out.copy()
+
+    def close(self):
+        self.pool.shutdown()
+        self.input.release()
+        self.output.release()
+        self.forest_shm.close()
+        self.forest_shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,270 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hdp_core import Predictor, get_predictor, record_error
+from hdp_metrics import LatencyStats, get_metrics, prometheus_text, timer
+from hdp_model import ARTIFACT_DIR, DATA_PATH, FEATURES, risk_tier
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+MAX_BODY = 16 * 1024 * 1024
+
+
+# Coalesces records from concurrent requests into a single Predictor.predict_proba call,
+# which serves repeated patients from its cache and picks up retrained artifacts.
+# The first request of a batch opens a window of window_ms; everything that arrives
+# before it closes (or until max_batch rows) is scored together.
+class MicroBatcher:
+    def __init__(self, predictor, window_ms=2.0, max_batch=4096):
+        self.predictor = predictor
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.pending = []
+        self.pending_rows = 0
+        self.timer = None
+        # One worker keeps batches ordered and leaves the event loop free
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.batched_rows = 0
+
+    def submit(self, records):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((records, future))
+        self.pending_rows += len(records)
+        if self.pending_rows >= self.max_batch or self.window <= 0:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        pending, self.pending, self.pending_rows = self.pending, [], 0
+        asyncio.ensure_future(self.run_batch(pending))
+
+    async def run_batch(self, pending):
+        records = [record for batch, _ in pending for record in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            proba = await loop.run_in_executor(self.executor, self.predict, records)
+        except Exception as e:
+            if len(pending) > 1:
+                # One request's failure must not fail the others that shared its batch
+                for item in pending:
+                    await self.run_batch([item])
+                return
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched_rows += len(records)
+        start = 0
+        for batch, future in pending:
+            if not future.done():
+                future.set_result(proba[start:start + len(batch)])
+            start += len(batch)
+
+    def predict(self, records):
+        with timer('server.predict'):
+            return self.predictor.predict_proba(records)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class PredictionServer:
+    def __init__(self, predictor, window_ms=2.0, max_batch=4096):
+        self.predictor = predictor
+        self.batcher = MicroBatcher(predictor, window_ms, max_batch)
+        self.stats = LatencyStats()
+        self.started = time.time()
+
+    def parse_payload(self, payload):
+        if isinstance(payload, dict) and 'records' in payload:
+            records, single = payload['records'], False
+        elif isinstance(payload, list):
+            records, single = payload, False
+        else:
+            records, single = [payload], True
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            raise ValueError("expected a record object or a list of records")
+        # The monitor of the current model, before validating so that rejected records count as invalid
+        monitor = self.predictor.monitor
+        if monitor is not None:
+            monitor.observe(records)
+        for i, record in enumerate(records):
+            missing = [field for field in FEATURES if field not in record]
+            # Non-finite numbers and unknown categories are rejected like in the GUI form
+            error = f"missing field {missing[0]!r}" if missing else record_error(record)
+            if error is not None:
+                raise ValueError(error if single else f"record {i}: {error}")
+        return records, single
+
+    async def predict(self, body):
+        try:
+            with timer('server.parse'):
+                records, single = self.parse_payload(json.loads(body))
+        except ValueError as e:
+            return 400, {'error': str(e)}
+        proba = await self.batcher.submit(records)
+        results = []
+        for p in proba:
+            risk_percent = round(float(p) * 100, 1)
+            results.append({'risk_percent': risk_percent, 'risk_tier': risk_tier(risk_percent)})
+        return 200, results[0] if single else {'results': results}
+
+    def health(self):
+        batcher = self.batcher
+        health = {
+            'status': 'ok',
+            'uptime_s': round(time.time() - self.started, 1),
+            'model': self.predictor.model_key,
+            'features': self.predictor.encoder.feature_columns,
+            'latency': self.stats.summary(),
+            'batches': batcher.batches,
+            'mean_batch_rows': round(batcher.batched_rows / batcher.batches, 2) if batcher.batches else 0,
+            'cache': self.predictor.cache.stats(),
+        }
+        monitor = self.predictor.monitor
+        if monitor is not None:
+            health['drift'] = monitor.snapshot()
+        return health
+
+    def metrics(self):
+        # Prometheus text: request latency, plus the stage timers when HDP_METRICS is on
+        stages = {'server.request': self.stats}
+        if get_metrics() is not None:
+            stages.update(get_metrics().stage_stats())
+        text = prometheus_text(stages)
+        monitor = self.predictor.monitor
+        if monitor is not None:
+            text += monitor.to_prometheus()
+        return text
+
+    async def route(self, method, path, body):
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': "use GET"}
+            return 200, self.health()
+        if path == '/metrics':
+            if method != 'GET':
+                return 405, {'error': "use GET"}
+            return 200, self.metrics()
+        if path == '/predict':
+            if method != 'POST':
+                return 405, {'error': "use POST"}
+            start = time.perf_counter()
+            status, payload = await self.predict(body)
+            if status == 200:
+                self.stats.add(time.perf_counter() - start)
+            return status, payload
+        return 404, {'error': f"unknown path {path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.respond(writer, 400, {'error': "malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self.respond(writer, 400, {'error': "invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {'error': "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                try:
+                    status, payload = await self.route(method, path.split('?', 1)[0], body)
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            body, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on http://{host}:{port} (batch window {self.batcher.window * 1e3:g} ms)", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.batcher.close()
+            print(f"Latency: {json.dumps(self.stats.summary())}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP prediction service for the heart disease model")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--window-ms', type=float, default=2.0,
+                        help="how long to wait for more requests before scoring a batch (0 disables batching)")
+    parser.add_argument('--max-batch', type=int, default=4096, help="score immediately once this many rows are queued")
+    parser.add_argument('--data', default=DATA_PATH, help="training dataset")
+    parser.add_argument('--artifacts', default=ARTIFACT_DIR, help="model artifact directory")
+    parser.add_argument('--compact', metavar='PATH', help="serve a model file written by hdp_train.py compact")
+    args = parser.parse_args(argv)
+
+    if args.compact:
+        from hdp_compact import load_compact
+
+        # A fixed model: no artifact directory to watch and no reference to monitor against
+        predictor = Predictor(*load_compact(args.compact), artifact_dir=None)
+    else:
+        predictor = get_predictor(args.data, args.artifacts)
+    server = PredictionServer(predictor, args.window_ms, args.max_batch)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
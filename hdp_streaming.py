@@ -0,0 +1,201 @@
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+from hdp_metrics import timer
+from hdp_model import (ARTIFACT_DIR, CATEGORICAL_COLS, DATA_PATH, FEATURES, MODEL_PARAMS, TARGET, artifact_key,
+                       drop_zero_vitals, file_hash, model_params, save_artifact)
+
+# Out-of-core training for datasets that do not fit in memory. The CSV is read in
+# chunks twice: pass 1 collects the MinMax range of every column, the category values
+# and the class counts; pass 2 keeps a stratified random sample sized to the memory
+# budget. The forest is fit on the sample and the scaler on the pass-1 ranges, so the
+# saved artifact is interchangeable with one from train_model.
+
+# Rough memory cost of fitting, measured on the synthetic patients: the float64
+# sample plus sklearn's float32 copy, per-thread index buffers of the tree builder,
+# and the trees, which grown out hold ~0.4 nodes per sample at 64 + 16 bytes a node
+# and are copied once more when the artifact is written
+FIT_BYTES_PER_FEATURE = 8 + 4
+FIT_BYTES_PER_THREAD = 48
+NODES_PER_ROW = 0.4
+NODE_BYTES = 2 * (64 + 16)
+# Rough bytes per CSV row while pandas parses a chunk
+PARSE_BYTES_PER_ROW = 1024
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def read_chunks(data_path, chunk_rows):
+    import pandas as pd
+
+    for chunk in pd.read_csv(data_path, chunksize=chunk_rows):
+        yield drop_zero_vitals(chunk)
+
+
+def scan_statistics(data_path, chunk_rows):
+    # Pass 1: column min/max, category values and class counts, in constant memory
+    numeric, mins, maxs = None, None, None
+    categories = {column: set() for column in CATEGORICAL_COLS}
+    class_counts = {}
+    for chunk in read_chunks(data_path, chunk_rows):
+        if numeric is None:
+            numeric = [c for c in chunk.columns if c not in CATEGORICAL_COLS and c != TARGET]
+            mins = np.full(len(numeric), np.inf)
+            maxs = np.full(len(numeric), -np.inf)
+        if not len(chunk):
+            continue
+        values = chunk[numeric].to_numpy(dtype=np.float64)
+        mins = np.minimum(mins, np.nanmin(values, axis=0))
+        maxs = np.maximum(maxs, np.nanmax(values, axis=0))
+        for column in CATEGORICAL_COLS:
+            categories[column].update(chunk[column].dropna().unique())
+        for label, count in chunk[TARGET].value_counts().items():
+            class_counts[label] = class_counts.get(label, 0) + int(count)
+
+    # Same column order as pd.get_dummies on the whole frame
+    feature_columns = list(numeric)
+    for column in CATEGORICAL_COLS:
+        feature_columns += [f"{column}_{value}" for value in sorted(categories[column])]
+    return feature_columns, numeric, mins, maxs, class_counts
+
+
+def build_scaler(feature_columns, numeric, mins, maxs):
+    from sklearn.preprocessing import MinMaxScaler
+
+    # Fitting on the two extreme rows gives exactly the scaler fit_transform would give
+    # on all rows; dummy columns span 0..1 wherever a category occurs at all
+    low = np.zeros(len(feature_columns))
+    high = np.ones(len(feature_columns))
+    low[:len(numeric)] = mins
+    high[:len(numeric)] = maxs
+    scaler = MinMaxScaler()
+    scaler.fit(np.vstack([low, high]))
+    return scaler
+
+
+def sample_size(budget, n_features, params, n_jobs):
+    # Largest sample whose estimated fitting cost stays within budget bytes
+    threads = os.cpu_count() if n_jobs == -1 else (n_jobs or 1)
+    per_row = n_features * FIT_BYTES_PER_FEATURE + threads * FIT_BYTES_PER_THREAD
+    n_trees = params.get('n_estimators', MODEL_PARAMS['n_estimators'])
+    if params.get('max_depth') is None:
+        return int(budget // (per_row + n_trees * NODES_PER_ROW * NODE_BYTES))
+    # Depth-limited trees stop growing with the sample
+    tree_bytes = n_trees * (2 ** (params['max_depth'] + 1)) * NODE_BYTES
+    rows = int(budget // (per_row + n_trees * NODES_PER_ROW * NODE_BYTES))
+    return max(rows, int((budget - tree_bytes) // per_row))
+
+
+def sample_plan(class_counts, sample_rows, seed):
+    # Stratified: each class keeps its share, rows drawn uniformly within the class
+    rng = np.random.default_rng(seed)
+    total = sum(class_counts.values())
+    plan = {}
+    for label, count in class_counts.items():
+        k = min(count, max(1, round(sample_rows * count / total)))
+        chosen = np.zeros(count, dtype=bool)
+        chosen[rng.choice(count, size=k, replace=False)] = True
+        plan[label] = chosen
+    return plan
+
+
+def collect_sample(data_path, chunk_rows, feature_columns, plan):
+    import pandas as pd
+
+    # Pass 2: keep the planned rows of every class, encoded for fitting and as raw values
+    # for the drift reference. Raw categoricals are kept as 1-byte category codes; the
+    # raw sample is dropped before fitting, so it does not add to the peak.
+    dtypes = {column: pd.CategoricalDtype([c[len(column) + 1:] for c in feature_columns if c.startswith(column + '_')])
+              for column in CATEGORICAL_COLS}
+    seen = {label: 0 for label in plan}
+    X_parts, y_parts, raw_parts = [], [], []
+    for chunk in read_chunks(data_path, chunk_rows):
+        keep = np.zeros(len(chunk), dtype=bool)
+        labels = chunk[TARGET].to_numpy()
+        for label, chosen in plan.items():
+            rows = np.flatnonzero(labels == label)
+            keep[rows] = chosen[seen[label]:seen[label] + len(rows)]
+            seen[label] += len(rows)
+        if keep.any():
+            picked = pd.get_dummies(chunk[keep], columns=CATEGORICAL_COLS)
+            picked = picked.reindex(columns=feature_columns, fill_value=0)
+            X_parts.append(picked.to_numpy(dtype=np.float64))
+            y_parts.append(labels[keep])
+            raw_parts.append(chunk.loc[keep, FEATURES].astype(dtypes))
+    return np.vstack(X_parts), np.concatenate(y_parts), pd.concat(raw_parts, ignore_index=True)
+
+
+def train_streaming(data_path=DATA_PATH, artifact_dir=ARTIFACT_DIR, memory_budget_mb=512, chunk_rows=None,
+                    params=None, n_jobs=None, seed=0, log=print):
+    import pandas  # noqa: F401  (the libraries are not part of the budget)
+    from sklearn.ensemble import RandomForestClassifier
+
+    from hdp_drift import reference_profile
+
+    start = time.perf_counter()
+    baseline = peak_rss_bytes()
+    budget = memory_budget_mb * 1024 * 1024
+    if chunk_rows is None:
+        chunk_rows = max(1000, min(1_000_000, budget // (4 * PARSE_BYTES_PER_ROW)))
+    params = model_params(artifact_dir) if params is None else params
+
+    with timer('stream.scan'):
+        feature_columns, numeric, mins, maxs, class_counts = scan_statistics(data_path, chunk_rows)
+    total_rows = sum(class_counts.values())
+    log(f"Pass 1: {total_rows} rows, {len(feature_columns)} features ({time.perf_counter() - start:.1f}s)")
+
+    # Whatever the budget leaves after parsing one chunk goes to the training sample
+    fit_budget = budget - chunk_rows * PARSE_BYTES_PER_ROW
+    sample_rows = min(total_rows, max(1000, sample_size(fit_budget, len(feature_columns), params, n_jobs)))
+    plan = sample_plan(class_counts, sample_rows, seed)
+    with timer('stream.sample'):
+        X, y, raw = collect_sample(data_path, chunk_rows, feature_columns, plan)
+    del plan
+    log(f"Pass 2: sampled {len(X)} of {total_rows} rows ({time.perf_counter() - start:.1f}s)")
+    with timer('stream.reference'):
+        # The drift reference comes from the sample, which keeps each class's share
+        reference = reference_profile(raw)
+    del raw
+
+    scaler = build_scaler(feature_columns, numeric, mins, maxs)
+    X = scaler.transform(X)
+    with timer('stream.fit'):
+        model = RandomForestClassifier(**params, n_jobs=n_jobs)
+        model.fit(X, y)
+    model.set_params(n_jobs=None)
+    model.reference_profile_ = reference
+    del X
+
+    data_hash = file_hash(data_path)
+    # Same manifest as data_manifest, from the pass-1 counts, so `update` works on top
+    manifest = {
+        'bytes': os.path.getsize(data_path),
+        'sha256': data_hash,
+        'rows': total_rows,
+        'positive_rate': class_counts.get(1, 0) / total_rows if total_rows else 0.0,
+    }
+    save_artifact(model, scaler, feature_columns, artifact_key(data_path, params, data_hash), params,
+                  artifact_dir, {'data': manifest, 'sampled_rows': int(len(y))})
+
+    peak = peak_rss_bytes()
+    report = {
+        'rows': total_rows,
+        'sampled_rows': int(len(y)),
+        'chunk_rows': int(chunk_rows),
+        'seconds': round(time.perf_counter() - start, 2),
+        'peak_rss_mb': round(peak / 2**20, 1),
+        'peak_above_start_mb': round((peak - baseline) / 2**20, 1),
+        'budget_mb': memory_budget_mb,
+    }
+    log(f"Trained {params.get('n_estimators', MODEL_PARAMS['n_estimators'])} trees on {len(y)} rows in "
+        f"{report['seconds']}s; peak RSS {report['peak_rss_mb']} MB "
+        f"({report['peak_above_start_mb']} MB above start, budget {memory_budget_mb} MB)")
+    return report
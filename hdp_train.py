@@ -0,0 +1,318 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from hdp_model import (ARTIFACT_DIR, DATA_PATH, MODEL_PARAMS, artifact_paths, encode_frame, file_hash,
+                       forest_path, load_data, load_forest, load_model, model_params, save_model_params,
+                       update_model)
+
+# Bump when the meaning of a cached fold result changes
+CV_CACHE_VERSION = 1
+
+DEFAULT_GRID = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [None, 4, 6, 8, 12],
+    'max_features': ['sqrt', 'log2', None],
+}
+
+# Per-process copy of the encoded dataset, filled by init_worker
+_worker_data = {}
+
+
+def init_worker(data_path, artifact_dir):
+    X, y, _ = encode_frame(load_data(data_path, artifact_dir=artifact_dir))
+    _worker_data['X'] = X.to_numpy(dtype=np.float64)
+    _worker_data['y'] = y.to_numpy()
+
+
+def fold_indices(y, n_folds, seed):
+    from sklearn.model_selection import StratifiedKFold
+
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+
+def run_fold(params, fold, n_folds, seed):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import roc_auc_score
+    from sklearn.preprocessing import MinMaxScaler
+
+    X, y = _worker_data['X'], _worker_data['y']
+    train_idx, test_idx = fold_indices(y, n_folds, seed)[fold]
+
+    # Fit the scaler on the training fold only, as train_model does on the full data
+    scaler = MinMaxScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+
+    start = time.perf_counter()
+    model = RandomForestClassifier(**params)
+    model.fit(X_train, y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    auc = roc_auc_score(y[test_idx], model.predict_proba(X_test)[:, 1])
+    return {
+        'auc': float(auc),
+        'nodes': int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+        'fit_seconds': fit_seconds,
+    }
+
+
+def expand_grid(grid):
+    names = sorted(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def search_space(grid, n_random, seed):
+    candidates = list(expand_grid(grid))
+    if n_random and n_random < len(candidates):
+        candidates = random.Random(seed).sample(candidates, n_random)
+    return [dict(params, random_state=MODEL_PARAMS['random_state']) for params in candidates]
+
+
+def cell_key(data_hash, params, fold, n_folds, seed):
+    payload = json.dumps({'data': data_hash, 'params': params, 'fold': fold, 'folds': n_folds,
+                          'seed': seed, 'version': CV_CACHE_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def read_cell(cache_dir, key):
+    try:
+        with open(os.path.join(cache_dir, f"{key}.json"), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cell(cache_dir, key, result):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{key}.json")
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+    os.replace(path + '.tmp', path)
+
+
+def cross_validate(candidates, data_path, n_folds, seed, cache_dir, workers, artifact_dir=ARTIFACT_DIR):
+    data_hash = file_hash(data_path)
+    results = {}
+    todo = []
+    for i, params in enumerate(candidates):
+        for fold in range(n_folds):
+            key = cell_key(data_hash, params, fold, n_folds, seed)
+            cached = read_cell(cache_dir, key)
+            if cached is None:
+                todo.append((i, fold, key))
+            else:
+                results[i, fold] = cached
+
+    print(f"{len(candidates)} candidates x {n_folds} folds: {len(results)} cached, {len(todo)} to compute",
+          file=sys.stderr)
+    if todo:
+        # Build the column cache once here rather than racing to build it in every worker
+        load_data(data_path, artifact_dir=artifact_dir)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(data_path, artifact_dir)) as pool:
+            futures = {pool.submit(run_fold, candidates[i], fold, n_folds, seed): (i, fold, key)
+                       for i, fold, key in todo}
+            for done, future in enumerate(as_completed(futures), start=1):
+                i, fold, key = futures[future]
+                results[i, fold] = future.result()
+                write_cell(cache_dir, key, results[i, fold])
+                print(f"\r{done}/{len(todo)} folds", end='', file=sys.stderr)
+        print(file=sys.stderr)
+
+    summary = []
+    for i, params in enumerate(candidates):
+        folds = [results[i, fold] for fold in range(n_folds)]
+        aucs = [r['auc'] for r in folds]
+        summary.append({
+            'params': params,
+            'auc': float(np.mean(aucs)),
+            'auc_std': float(np.std(aucs)),
+            'nodes': float(np.mean([r['nodes'] for r in folds])),
+            'fit_seconds': float(np.mean([r['fit_seconds'] for r in folds])),
+        })
+    return summary
+
+
+def select_model(summary, tolerance):
+    # Smallest forest (total nodes, a proxy for inference cost and size) within tolerance of the best AUC
+    best_auc = max(entry['auc'] for entry in summary)
+    eligible = [entry for entry in summary if entry['auc'] >= best_auc - tolerance]
+    return min(eligible, key=lambda entry: (entry['nodes'], -entry['auc'])), best_auc
+
+
+def parse_grid_value(value):
+    if value.lower() == 'none':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def cmd_fit(args):
+    start = time.perf_counter()
+    load_model(args.data, artifact_dir=args.artifacts, retrain=True, n_jobs=-1)
+    print(f"Trained {model_params(args.artifacts)} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def cmd_update(args):
+    start = time.perf_counter()
+    result = update_model(args.data, args.artifacts, trees=args.trees, old_sample_ratio=args.old_sample,
+                          max_growth=args.max_growth, max_out_of_range=args.max_out_of_range,
+                          max_rate_shift=args.max_rate_shift, max_rate_z=args.max_rate_z,
+                          max_tree_factor=args.max_tree_factor, n_jobs=-1)
+    print(f"{result['mode']}: {result['reason']} ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+def cmd_stream(args):
+    from hdp_streaming import train_streaming
+
+    report = train_streaming(args.data, args.artifacts, memory_budget_mb=args.memory_budget,
+                             chunk_rows=args.chunksize, n_jobs=-1, seed=args.seed)
+    if report['peak_above_start_mb'] > args.memory_budget:
+        print(f"Peak memory exceeded the {args.memory_budget} MB budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+def directory_bytes(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def cmd_compact(args):
+    from hdp_compact import COMPACT_FILE, CompactForest, compact_report, save_compact
+    from hdp_encoder import FeatureEncoder
+
+    model, scaler, feature_columns = load_model(args.data, artifact_dir=args.artifacts, n_jobs=-1)
+    forest = load_forest(model, args.artifacts)
+    encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+    # The training rows are the reference for pruning and for the error report
+    X = encoder.encode_columns(load_data(args.data, artifact_dir=args.artifacts))
+    compact = CompactForest.from_forest(forest, len(feature_columns), X, args.prune_tolerance / 100)
+    output = args.output or os.path.join(args.artifacts, COMPACT_FILE)
+    save_compact(output, compact, encoder)
+
+    report = compact_report(forest, compact, X)
+    size = os.path.getsize(output)
+    forest_bytes = sum(getattr(forest, name).nbytes for name in ('feature', 'threshold', 'children', 'value', 'roots'))
+    for name, original in ((os.path.basename(artifact_paths(args.artifacts)[1]),
+                            os.path.getsize(artifact_paths(args.artifacts)[1])),
+                           ('forest/', directory_bytes(forest_path(args.artifacts)))):
+        print(f"{output}: {size / 1024:.1f} KB, {original / size:.1f}x smaller than {name} ({original / 1024:.1f} KB)")
+    print(f"Node arrays in memory: {compact.nbytes / 1024:.1f} KB against {forest_bytes / 1024:.1f} KB "
+          f"for the flattened forest ({forest_bytes / compact.nbytes:.1f}x)")
+    print(f"{report['trees_kept']} of {report['trees']} trees kept; risk error on {report['rows']} training rows: "
+          f"max {report['max_error_pp']:.4f} pp, mean {report['mean_error_pp']:.4f} pp")
+    if report['max_error_pp'] > args.max_error:
+        print(f"Risk error exceeds {args.max_error:g} pp", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_search(args):
+    grid = dict(DEFAULT_GRID)
+    for spec in args.grid or []:
+        name, _, values = spec.partition('=')
+        grid[name] = [parse_grid_value(v) for v in values.split(',')]
+
+    candidates = search_space(grid, args.random, args.seed)
+    cache_dir = os.path.join(args.artifacts, 'cv_cache')
+    start = time.perf_counter()
+    summary = cross_validate(candidates, args.data, args.folds, args.seed, cache_dir, args.workers,
+                             args.artifacts)
+    chosen, best_auc = select_model(summary, args.tolerance)
+
+    summary.sort(key=lambda entry: -entry['auc'])
+    for entry in summary[:args.top]:
+        marker = '*' if entry is chosen else ' '
+        print(f"{marker} auc {entry['auc']:.4f} ±{entry['auc_std']:.4f}  nodes {entry['nodes']:9.0f}  {entry['params']}")
+    print(f"Best AUC {best_auc:.4f}; chose {chosen['params']} (AUC {chosen['auc']:.4f}, "
+          f"{chosen['nodes']:.0f} nodes) in {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(args.artifacts, exist_ok=True)
+    with open(os.path.join(args.artifacts, 'search_results.json'), 'w', encoding='utf-8') as f:
+        json.dump({'tolerance': args.tolerance, 'best_auc': best_auc, 'chosen': chosen, 'results': summary}, f, indent=2)
+
+    if args.apply:
+        save_model_params(chosen['params'], args.artifacts)
+        load_model(args.data, artifact_dir=args.artifacts, n_jobs=-1)
+        print(f"Saved the chosen parameters and retrained the artifact in {args.artifacts}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and tune the heart disease model")
+    parser.add_argument('--data', default=DATA_PATH, help="training dataset")
+    parser.add_argument('--artifacts', default=ARTIFACT_DIR, help="model artifact directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    fit = commands.add_parser('fit', help="retrain the artifact with the current parameters")
+    fit.set_defaults(func=cmd_fit)
+
+    update = commands.add_parser('update', help="grow the forest with rows appended to the dataset")
+    update.add_argument('--trees', type=int, help="trees to add (default: proportional to the new rows)")
+    update.add_argument('--old-sample', type=float, default=1.0,
+                        help="old rows sampled into the new trees' training set, as a multiple of the new rows")
+    update.add_argument('--max-growth', type=float, default=0.5,
+                        help="rebuild from scratch when new rows exceed this fraction of the rows seen")
+    update.add_argument('--max-out-of-range', type=float, default=0.05,
+                        help="rebuild when this fraction of new rows falls outside the training min/max")
+    update.add_argument('--max-rate-shift', type=float, default=0.1,
+                        help="rebuild when the share of positive outcomes moves by more than this...")
+    update.add_argument('--max-rate-z', type=float, default=3.0,
+                        help="...and the move is this many standard errors beyond chance for the new rows")
+    update.add_argument('--max-tree-factor', type=float, default=3.0,
+                        help="rebuild when the forest would exceed this multiple of n_estimators")
+    update.set_defaults(func=cmd_update)
+
+    stream = commands.add_parser('stream', help="train on a dataset larger than memory, in chunks")
+    stream.add_argument('--memory-budget', type=int, default=512, metavar='MB',
+                        help="memory for parsing and fitting; sets the chunk and sample sizes")
+    stream.add_argument('--chunksize', type=int, help="CSV rows per chunk (default: from the budget)")
+    stream.add_argument('--seed', type=int, default=0, help="seed for the training sample")
+    stream.set_defaults(func=cmd_stream)
+
+    compact = commands.add_parser('compact', help="write a quantized copy of the model for deployment")
+    compact.add_argument('-o', '--output', help="compact model file (default: ARTIFACTS/model_compact.npz)")
+    compact.add_argument('--prune-tolerance', type=float, default=0.0, metavar='PP',
+                         help="merge trees whose predictions on the training rows all agree within this "
+                              "many percentage points (default: 0, off)")
+    compact.add_argument('--max-error', type=float, default=0.5, metavar='PP',
+                         help="exit with an error if the risk error exceeds this many percentage points")
+    compact.set_defaults(func=cmd_compact)
+
+    search = commands.add_parser('search', help="cross-validated hyperparameter search")
+    search.add_argument('--folds', type=int, default=5)
+    search.add_argument('--seed', type=int, default=42)
+    search.add_argument('--grid', action='append', metavar='NAME=V1,V2',
+                        help="override a grid axis, e.g. --grid max_depth=None,6,10")
+    search.add_argument('--random', type=int, default=0, help="sample this many grid points instead of all")
+    search.add_argument('--tolerance', type=float, default=0.005,
+                        help="accept models whose mean AUC is within this of the best")
+    search.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    search.add_argument('--top', type=int, default=15, help="rows of the leaderboard to print")
+    search.add_argument('--apply', action='store_true', help="save the chosen parameters and retrain the artifact")
+    search.set_defaults(func=cmd_search)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
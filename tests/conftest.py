@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hdp_model import FEATURES, load_data, train_model  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def patients():
+    # The real dataset, parsed without the artifact cache
+    return load_data(os.path.join(ROOT, 'heart_disease_prediction.csv'), use_cache=False).reset_index(drop=True)
+
+
+@pytest.fixture(scope='session')
+def trained(patients):
+    # A small forest, enough to exercise every code path quickly
+    model, scaler, feature_columns = train_model(patients, {'n_estimators': 15, 'random_state': 0})
+    return model, scaler, feature_columns
+
+
+@pytest.fixture(scope='session')
+def records(patients):
+    return patients[FEATURES].to_dict('records')
@@ -0,0 +1,20 @@
+import numpy as np
+
+from hdp_batch import score_chunk
+from hdp_encoder import FeatureEncoder
+
+
+def test_rows_with_unknown_categories_are_skipped(patients, trained):
+    model, scaler, feature_columns = trained
+    encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+    chunk = patients.head(6).astype({'Age': object})
+    chunk.loc[1, 'Sex'] = 'Q'
+    chunk.loc[3, 'ST_Slope'] = 'Sideways'
+    chunk.loc[4, 'Age'] = 'forty'
+    scored, skipped, _ = score_chunk(chunk, model, encoder)
+    assert skipped == 3
+    assert np.isnan(scored['risk_percent'].to_numpy()[[1, 3, 4]]).all()
+    assert list(scored['risk_tier'][[1, 3, 4]]) == ['', '', '']
+    kept = patients.head(6).iloc[[0, 2, 5]]
+    expected = np.round(model.predict_proba(encoder.encode_columns(kept))[:, 1] * 100, 1)
+    assert np.array_equal(scored['risk_percent'].to_numpy()[[0, 2, 5]], expected)
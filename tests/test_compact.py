@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from hdp_compact import (PROB_SCALE, CompactForest, load_compact, merge_duplicates, save_compact,
+                         tree_predictions)
+from hdp_encoder import FeatureEncoder
+from hdp_forest import FlatForest
+from hdp_model import encode_frame
+
+# Every leaf is rounded to the nearest 1/PROB_SCALE, so the tree average is off by at most half that
+TOLERANCE = 0.5 / PROB_SCALE + 1e-12
+
+
+@pytest.fixture(scope='module')
+def encoded(patients, trained):
+    _, scaler, _ = trained
+    return scaler.transform(encode_frame(patients)[0])
+
+
+@pytest.fixture(scope='module')
+def forest(trained):
+    return FlatForest.from_sklearn(trained[0])
+
+
+def on_thresholds(forest, encoded):
+    # Rows whose every split feature lies exactly on one of that feature's thresholds
+    rng = np.random.default_rng(0)
+    X = encoded[:200].copy()
+    for f in range(X.shape[1]):
+        thresholds = forest.threshold[forest.feature == f]
+        if len(thresholds):
+            X[:, f] = rng.choice(thresholds, len(X))
+    return X
+
+
+def test_matches_flat_forest(forest, encoded):
+    compact = CompactForest.from_forest(forest, encoded.shape[1])
+    outside = encoded * 3 - 1
+    for X in (encoded, on_thresholds(forest, encoded), outside):
+        np.testing.assert_allclose(compact.predict_proba(X), forest.predict_proba(X), rtol=0, atol=TOLERANCE)
+    # Blocks smaller than the input give the same result
+    assert np.array_equal(compact.predict_proba(encoded, block_rows=100), compact.predict_proba(encoded))
+
+
+def test_save_load_round_trip(tmp_path, trained, forest, encoded):
+    _, scaler, feature_columns = trained
+    compact = CompactForest.from_forest(forest, encoded.shape[1])
+    path = str(tmp_path / 'model_compact.npz')
+    save_compact(path, compact, FeatureEncoder.from_scaler(scaler, feature_columns))
+    loaded, encoder = load_compact(path)
+    assert encoder.feature_columns == list(feature_columns)
+    assert np.array_equal(loaded.predict_proba(encoded), compact.predict_proba(encoded))
+
+
+def test_merged_trees_keep_their_weight(forest, encoded):
+    predictions = tree_predictions(forest, encoded)
+    # Duplicating every tree must fold each copy back into its original
+    kept, weights = merge_duplicates(np.concatenate([predictions, predictions]), 0.0)
+    assert sum(weights) == 2 * forest.n_estimators
+    assert kept == list(range(len(kept))) and all(w >= 2 for w in weights)
+
+    compact = CompactForest.from_forest(forest, encoded.shape[1], encoded, prune_tolerance=1.0)
+    assert int(compact.weights.sum()) == forest.n_estimators
+    # Leaf probabilities never differ by more than 1, so every tree folds into the first
+    assert compact.n_estimators == 1
@@ -0,0 +1,63 @@
+from concurrent.futures import Future
+
+from hdp_core import LatestRequest, record_error
+
+
+class ManualExecutor:
+    # Futures run only when the test says so
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, func, *args):
+        future = Future()
+        self.jobs.append((future, func, args))
+        return future
+
+    def run_next(self):
+        future, func, args = self.jobs.pop(0)
+        future.set_result(func(*args))
+
+
+def test_latest_request_runs_one_and_keeps_only_the_newest():
+    executor = ManualExecutor()
+    request = LatestRequest(executor)
+    for value in range(5):
+        request.submit(lambda v: v * 10, value)
+    # The first started at once; 1..3 were replaced while queued
+    assert len(executor.jobs) == 1 and request.dropped == 3
+    assert request.poll() is None
+
+    executor.run_next()
+    # Finished, but superseded: dropped, and the newest starts
+    assert request.poll() is None and request.dropped == 4
+    assert len(executor.jobs) == 1 and request.busy()
+
+    executor.run_next()
+    assert request.poll().result() == 40
+    assert not request.busy()
+
+
+def test_latest_request_cancel_drops_running_and_queued():
+    executor = ManualExecutor()
+    request = LatestRequest(executor)
+    request.submit(lambda: 'a')
+    request.submit(lambda: 'b')
+    request.cancel()
+    executor.run_next()
+    assert request.poll() is None
+    # The queued request was discarded, not started
+    assert not executor.jobs and not request.busy()
+
+    request.submit(lambda: 'c')
+    executor.run_next()
+    assert request.poll().result() == 'c'
+
+
+def test_record_error_accepts_json_numbers_and_rejects_non_finite(records):
+    record = records[0]
+    assert record_error(record) is None
+    assert record_error(dict(record, Age=float(record['Age']), FastingBS=str(record['FastingBS']))) is None
+    for field, value in (('Age', float('nan')), ('Oldpeak', float('inf')), ('Oldpeak', 'nan'),
+                         ('Age', 45.5), ('Age', True), ('Sex', 'Q'), ('FastingBS', 2), ('ST_Slope', None),
+                         ('Age', 10 ** 400), ('Oldpeak', 10 ** 400), ('Age', str(10 ** 400)), ('Oldpeak', '1e400')):
+        assert record_error(dict(record, **{field: value})) is not None, (field, value)
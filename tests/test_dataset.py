@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_patients
+from hdp_dataset import DatasetCache, load_frame
+from hdp_model import load_data
+
+
+def assert_same_frame(cached, expected):
+    expected = expected.reset_index(drop=True)
+    assert list(cached.columns) == list(expected.columns)
+    for column in expected.columns:
+        assert np.array_equal(cached[column].astype(expected[column].dtype).to_numpy(), expected[column].to_numpy())
+
+
+def fail_rebuild(*args):
+    raise AssertionError("the cache was rebuilt instead of appended to")
+
+
+def test_build_matches_csv(tmp_path):
+    csv_path = tmp_path / 'patients.csv'
+    generate_patients(2000, seed=1).to_csv(csv_path, index=False)
+    cached = load_frame(str(csv_path), str(tmp_path / 'cache'))
+    assert_same_frame(cached, load_data(str(csv_path), use_cache=False))
+
+
+def test_append_parses_only_the_tail(tmp_path, monkeypatch):
+    csv_path, cache_root = tmp_path / 'patients.csv', str(tmp_path / 'cache')
+    generate_patients(2000, seed=1).to_csv(csv_path, index=False)
+    load_frame(str(csv_path), cache_root)
+
+    tail = generate_patients(500, seed=2)
+    # A category the cache has not seen gets a new code; existing codes must not move
+    tail.loc[:9, 'ChestPainType'] = 'XX'
+    tail.to_csv(csv_path, mode='a', header=False, index=False)
+    monkeypatch.setattr(DatasetCache, 'build', fail_rebuild)
+    cached = load_frame(str(csv_path), cache_root)
+    assert_same_frame(cached, load_data(str(csv_path), use_cache=False))
+    assert DatasetCache(str(csv_path), cache_root).read_meta()['rows'] == len(cached)
+
+
+def test_rewritten_csv_is_rebuilt(tmp_path):
+    csv_path, cache_root = tmp_path / 'patients.csv', str(tmp_path / 'cache')
+    generate_patients(2000, seed=1).to_csv(csv_path, index=False)
+    load_frame(str(csv_path), cache_root)
+    # Longer than before but not an append: the prefix hash no longer matches
+    generate_patients(2500, seed=3).to_csv(csv_path, index=False)
+    assert_same_frame(load_frame(str(csv_path), cache_root), load_data(str(csv_path), use_cache=False))
+
+
+def test_cached_categories_sort_like_get_dummies(tmp_path):
+    csv_path = tmp_path / 'patients.csv'
+    generate_patients(300, seed=4).to_csv(csv_path, index=False)
+    cached = load_frame(str(csv_path), str(tmp_path / 'cache'))
+    parsed = load_data(str(csv_path), use_cache=False)
+    assert list(pd.get_dummies(cached).columns) == list(pd.get_dummies(parsed).columns)
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from hdp_drift import DriftMonitor, reference_profile
+from hdp_model import FEATURES
+
+
+def test_large_inputs_are_split_across_window_blocks(patients):
+    reference = reference_profile(patients)
+    frame = pd.concat([patients[FEATURES]] * 12, ignore_index=True)
+    whole = DriftMonitor(reference, window_rows=2000, block_rows=250)
+    whole.observe_columns(frame[:100])
+    whole.observe_columns(frame[100:])
+    # Slices that never cross a block boundary are the reference behaviour
+    sliced = DriftMonitor(reference, window_rows=2000, block_rows=250)
+    for start in range(0, len(frame), 50):
+        sliced.observe_columns(frame[start:start + 50])
+
+    snapshot, expected = whole.snapshot(), sliced.snapshot()
+    assert snapshot == expected
+    assert snapshot['records'] == len(frame)
+    assert 2000 - 250 < snapshot['window_records'] <= 2000
+
+
+def test_records_and_columns_count_the_same(patients, records):
+    reference = reference_profile(patients)
+    odd = [dict(records[0], Age='abc', Sex='Q', Cholesterol=0, Oldpeak=None), 'not a record']
+    by_record = DriftMonitor(reference, flush_rows=7)
+    for record in records[:300]:
+        by_record.observe(record)
+    by_record.observe(odd)
+    by_column = DriftMonitor(reference)
+    by_column.observe_columns(pd.DataFrame(records[:300] + odd[:1] + [{field: None for field in FEATURES}]))
+
+    snapshot = by_record.snapshot()
+    assert snapshot == by_column.snapshot()
+    assert snapshot['fields']['Age']['invalid'] == 2
+    assert snapshot['fields']['Sex']['unknown'] == 1
+    assert snapshot['fields']['Cholesterol']['zero'] == 1
+    assert snapshot['fields']['MaxHR']['records'] == 302
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from hdp_encoder import COLUMNS_MIN_ROWS, FeatureEncoder
+from hdp_model import CATEGORICAL_COLS, FEATURES
+
+
+def reference_encoding(frame, scaler, feature_columns):
+    # get_dummies + reindex + MinMaxScaler.transform, what the encoder replaces
+    data = pd.get_dummies(frame[FEATURES], columns=CATEGORICAL_COLS)
+    return scaler.transform(data.reindex(columns=feature_columns, fill_value=0))
+
+
+def test_single_records_are_bit_identical(patients, records, trained):
+    _, scaler, feature_columns = trained
+    encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+    expected = reference_encoding(patients, scaler, feature_columns)
+    for i in range(0, len(records), 37):
+        assert np.array_equal(encoder.encode(records[i]), expected[i:i + 1])
+
+
+def test_batches_are_bit_identical(patients, records, trained):
+    _, scaler, feature_columns = trained
+    encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+    expected = reference_encoding(patients, scaler, feature_columns)
+    # Both sides of the switch to the column-wise record path
+    for n_rows in (COLUMNS_MIN_ROWS - 1, COLUMNS_MIN_ROWS, len(records)):
+        assert np.array_equal(encoder.encode(records[:n_rows]), expected[:n_rows])
+    assert np.array_equal(encoder.encode_columns(patients), expected)
+
+
+def test_unknown_categories_and_text_values(records, trained):
+    _, scaler, feature_columns = trained
+    encoder = FeatureEncoder.from_scaler(scaler, feature_columns)
+    odd = dict(records[0], ChestPainType='XX', Age=str(records[0]['Age']), FastingBS=str(records[0]['FastingBS']))
+    expected = reference_encoding(pd.DataFrame([dict(records[0], ChestPainType='XX')]), scaler, feature_columns)
+    assert np.array_equal(encoder.encode(odd), expected)
+    batch = [odd] * COLUMNS_MIN_ROWS
+    assert np.array_equal(encoder.encode(batch), np.repeat(expected, len(batch), axis=0))
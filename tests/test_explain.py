@@ -0,0 +1,63 @@
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+
+from hdp_encoder import FeatureEncoder
+from hdp_explain import ForestExplainer
+from hdp_forest import FlatForest
+from hdp_model import CATEGORICAL_COLS, FEATURES
+
+
+def subset_value(forest, x, known):
+    # Path-dependent expectation of the forest output when only the features in known are
+    # set: unknown splits follow both children, weighted by their training cover
+    def walk(node):
+        feature = forest.feature[node]
+        if feature < 0:
+            return forest.value[node, 1]
+        left, right = forest.left[node], forest.right[node]
+        if feature in known:
+            return walk(right if x[feature] > forest.threshold[node] else left)
+        return (forest.cover[left] * walk(left) + forest.cover[right] * walk(right)) / forest.cover[node]
+
+    return sum(walk(root) for root in forest.roots) / forest.n_estimators
+
+
+def brute_force_shap(forest, x, n_features):
+    phi = np.zeros(n_features)
+    for i in range(n_features):
+        others = [j for j in range(n_features) if j != i]
+        for size in range(n_features):
+            weight = factorial(size) * factorial(n_features - size - 1) / factorial(n_features)
+            for subset in combinations(others, size):
+                known = set(subset)
+                phi[i] += weight * (subset_value(forest, x, known | {i}) - subset_value(forest, x, known))
+    return phi
+
+
+def test_matches_brute_force_shapley_values(patients):
+    from sklearn.ensemble import RandomForestClassifier
+
+    # Few features keep the 2^n subsets cheap; depth 4 gives paths with repeated features
+    columns = [field for field in FEATURES if field not in CATEGORICAL_COLS]
+    X = patients[columns].to_numpy(dtype=np.float64)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, patients['HeartDisease'])
+    forest = FlatForest.from_sklearn(model)
+    explainer = ForestExplainer(forest, columns)
+
+    rows = X[::150]
+    phi = explainer.shap_values(rows)
+    for x, row_phi in zip(np.float32(rows).astype(np.float64), phi):
+        assert np.allclose(row_phi, brute_force_shap(forest, x, len(columns)), rtol=0, atol=1e-12)
+    assert explainer.expected_value == pytest.approx(subset_value(forest, rows[0], set()), abs=1e-12)
+
+
+def test_contributions_add_up_to_the_prediction(patients, records, trained):
+    model, scaler, feature_columns = trained
+    forest = FlatForest.from_sklearn(model)
+    X = FeatureEncoder.from_scaler(scaler, feature_columns).encode(records)
+    base, contributions = ForestExplainer(forest, feature_columns).explain(X)
+    assert contributions.shape == (len(X), len(FEATURES))
+    assert np.allclose(base + contributions.sum(axis=1), forest.predict_proba(X)[:, 1], rtol=0, atol=1e-10)
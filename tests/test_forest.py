@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from hdp_forest import FOREST_ARRAYS, FlatForest
+from hdp_model import encode_frame, train_model
+
+
+@pytest.fixture(scope='module')
+def encoded(patients, trained):
+    _, scaler, _ = trained
+    return scaler.transform(encode_frame(patients)[0])
+
+
+def test_matches_sklearn(trained, encoded):
+    model = trained[0]
+    forest = FlatForest.from_sklearn(model)
+    assert np.array_equal(forest.predict_proba(encoded), model.predict_proba(encoded))
+    # Blocks smaller than the input give the same result
+    assert np.array_equal(forest.predict_proba(encoded, block_rows=100), model.predict_proba(encoded))
+
+
+def test_save_load_round_trip(tmp_path, trained, encoded):
+    forest = FlatForest.from_sklearn(trained[0])
+    forest.save(tmp_path)
+    loaded = FlatForest.load(tmp_path)
+    assert isinstance(loaded.feature, np.memmap)
+    assert np.array_equal(loaded.predict_proba(encoded), forest.predict_proba(encoded))
+
+
+def test_saving_over_a_mapped_forest_leaves_it_intact(tmp_path, patients, trained, encoded):
+    FlatForest.from_sklearn(trained[0]).save(tmp_path)
+    mapped = FlatForest.load(tmp_path)
+    before = mapped.predict_proba(encoded)
+    other, _, _ = train_model(patients, {'n_estimators': 5, 'max_depth': 3, 'random_state': 1})
+    FlatForest.from_sklearn(other).save(tmp_path)
+    assert np.array_equal(mapped.predict_proba(encoded), before)
+    assert np.array_equal(FlatForest.load(tmp_path).predict_proba(encoded), other.predict_proba(encoded))
+
+
+def test_load_rejects_arrays_of_different_forests(tmp_path, patients, trained):
+    FlatForest.from_sklearn(trained[0]).save(tmp_path)
+    other, _, _ = train_model(patients, {'n_estimators': 5, 'max_depth': 3, 'random_state': 1})
+    np.save(tmp_path / f"{FOREST_ARRAYS[1]}.npy", FlatForest.from_sklearn(other).threshold)
+    with pytest.raises(ValueError):
+        FlatForest.load(tmp_path)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from hdp_forest import FlatForest
+from hdp_model import encode_frame
+from hdp_parallel import ParallelScorer
+
+
+@pytest.fixture(scope='module')
+def encoded(patients, trained):
+    _, scaler, _ = trained
+    X = scaler.transform(encode_frame(patients)[0])
+    # Enough rows to span several tasks and push the shared buffers to grow
+    return np.tile(X, (-(-40000 // len(X)), 1))[:40000]
+
+
+def test_matches_flat_forest_across_calls(trained, encoded):
+    forest = FlatForest.from_sklearn(trained[0])
+    with ParallelScorer(forest, workers=2) as scorer:
+        names = []
+        # Growing sizes replace the shared blocks, so workers must re-attach; 5 again reuses them
+        for n_rows in (0, 1, 5, 17, 40000, 5):
+            X = encoded[:n_rows]
+            out = scorer.predict_proba(X)
+            assert out.shape == (n_rows, 2)
+            assert np.array_equal(out, forest.predict_proba(X))
+            names.append((scorer.input.shm.name, scorer.output.shm.name))
+        assert names[4] != names[3] and names[5] == names[4]
+
+        # Rows encoded straight into the shared input block
+        scorer.input_buffer(17, encoded.shape[1])[...] = encoded[100:117]
+        assert np.array_equal(scorer.predict_proba(n_rows=17), forest.predict_proba(encoded[100:117]))
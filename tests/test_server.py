@@ -0,0 +1,40 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from hdp_server import MicroBatcher, PredictionServer
+
+
+class FakePredictor:
+    monitor = None
+
+    def predict_proba(self, records):
+        if any(record.get('fail') for record in records):
+            raise OverflowError("cannot score")
+        return np.array([record['p'] for record in records], dtype=np.float64)
+
+
+def test_a_failing_request_does_not_fail_its_batch():
+    async def scenario():
+        batcher = MicroBatcher(FakePredictor(), window_ms=50)
+        try:
+            requests = [[{'p': 0.1}], [{'p': 0.2}, {'fail': True}], [{'p': 0.3}, {'p': 0.4}]]
+            return await asyncio.gather(*(batcher.submit(r) for r in requests), return_exceptions=True)
+        finally:
+            batcher.close()
+
+    first, failed, last = asyncio.run(scenario())
+    assert np.array_equal(first, [0.1]) and np.array_equal(last, [0.3, 0.4])
+    assert isinstance(failed, OverflowError)
+
+
+@pytest.mark.parametrize('payload', [{'records': 5}, {'records': {'Age': 40}}, {'records': []}, [1, 2], 'text'])
+def test_malformed_payloads_are_bad_requests(payload):
+    server = PredictionServer(FakePredictor())
+    try:
+        status, body = asyncio.run(server.predict(json.dumps(payload)))
+    finally:
+        server.batcher.close()
+    assert status == 400 and 'error' in body
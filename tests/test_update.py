@@ -0,0 +1,36 @@
+import os
+
+from hdp_model import DATA_PATH, load_model, load_predictor, save_model_params, update_model
+
+PARAMS = {'n_estimators': 10, 'random_state': 0}
+
+
+def test_update_grows_then_rebuilds(tmp_path):
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), DATA_PATH), 'rb') as f:
+        lines = f.readlines()
+    data_path = str(tmp_path / 'patients.csv')
+    artifact_dir = str(tmp_path / 'artifacts')
+    with open(data_path, 'wb') as f:
+        f.writelines(lines[:801])
+    save_model_params(PARAMS, artifact_dir)
+    load_model(data_path, artifact_dir=artifact_dir)
+
+    # Appended rows grow the saved forest, and the predictor accepts it for the new file
+    with open(data_path, 'ab') as f:
+        f.writelines(lines[801:])
+    result = update_model(data_path, artifact_dir, max_out_of_range=1.0)
+    assert result['mode'] == 'incremental', result['reason']
+    assert result['trees'] > PARAMS['n_estimators']
+    # A stale key would retrain from scratch with the base number of trees
+    forest, _ = load_predictor(data_path, artifact_dir=artifact_dir)
+    assert forest.n_estimators == result['trees']
+
+    assert update_model(data_path, artifact_dir)['mode'] == 'unchanged'
+
+    # Rewriting a row already trained on cannot be patched in; the model is rebuilt
+    with open(data_path, 'wb') as f:
+        f.writelines([lines[0], lines[2], lines[1]] + lines[3:])
+    result = update_model(data_path, artifact_dir)
+    assert result['mode'] == 'full', result['reason']
+    forest, _ = load_predictor(data_path, artifact_dir=artifact_dir)
+    assert forest.n_estimators == PARAMS['n_estimators']